@@ -0,0 +1,32 @@
+"""indices trigram en analisis
+
+Revision ID: 8f3a1d2c6b94
+Revises: 5e2b8c4d7a10
+Create Date: 2026-10-17 11:03:48.915204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f3a1d2c6b94'
+down_revision: Union[str, None] = '5e2b8c4d7a10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # pg_trgm permite que ilike('%texto%') use un índice GIN en vez de recorrer toda la tabla
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index('ix_analisis_name_trgm', 'analisis', ['name'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'})
+    op.create_index('ix_analisis_job_title_trgm', 'analisis', ['job_title'], unique=False,
+                    postgresql_using='gin', postgresql_ops={'job_title': 'gin_trgm_ops'})
+
+
+def downgrade() -> None:
+    op.drop_index('ix_analisis_job_title_trgm', table_name='analisis')
+    op.drop_index('ix_analisis_name_trgm', table_name='analisis')
@@ -0,0 +1,33 @@
+"""busqueda de texto en feedback
+
+Revision ID: c91e47d0a5f3
+Revises: 8f3a1d2c6b94
+Create Date: 2026-10-17 11:41:12.377590
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c91e47d0a5f3'
+down_revision: Union[str, None] = '8f3a1d2c6b94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # El índice b-tree sobre un Text tan grande no sirve para buscar y encarece cada insert
+    op.drop_index('ix_analisis_feedback', table_name='analisis')
+    op.add_column('analisis', sa.Column('feedback_tsv', postgresql.TSVECTOR(),
+                  sa.Computed("to_tsvector('spanish', coalesce(feedback, ''))", persisted=True), nullable=True))
+    op.create_index('ix_analisis_feedback_tsv', 'analisis', ['feedback_tsv'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    op.drop_index('ix_analisis_feedback_tsv', table_name='analisis')
+    op.drop_column('analisis', 'feedback_tsv')
+    op.create_index('ix_analisis_feedback', 'analisis', ['feedback'], unique=False)
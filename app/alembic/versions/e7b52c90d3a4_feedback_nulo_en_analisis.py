@@ -0,0 +1,33 @@
+"""feedback nulo en analisis
+
+Revision ID: e7b52c90d3a4
+Revises: d4a7b2e91f60
+Create Date: 2026-10-17 18:05:41.902113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b52c90d3a4'
+down_revision: Union[str, None] = 'd4a7b2e91f60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column('analisis', 'feedback',
+               existing_type=sa.TEXT(),
+               nullable=True)
+    # Los análisis en lote guardaban este texto de relleno cuando fallaba GPT
+    op.execute("UPDATE analisis SET feedback = NULL WHERE feedback = 'No se pudo generar feedback'")
+
+
+def downgrade() -> None:
+    op.execute("UPDATE analisis SET feedback = 'No se pudo generar feedback' WHERE feedback IS NULL")
+    op.alter_column('analisis', 'feedback',
+               existing_type=sa.TEXT(),
+               nullable=False)
@@ -1,25 +1,145 @@
-import os
-from config import ORIGINS
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import jwt
+import requests
 from fastapi import Request
-from clerk_backend_api import Clerk
-from clerk_backend_api.jwks_helpers import authenticate_request, AuthenticateRequestOptions
-
-def is_signed_in(request: Request):
-    sdk = Clerk(bearer_auth=os.getenv('CLERK_SECRET_KEY'))
-    request_state = sdk.authenticate_request(
-        request,
-        AuthenticateRequestOptions(
-            authorized_parties=ORIGINS
-        )
-    )
-    return request_state.is_signed_in
+from profiling import perfilado
+from config import ORIGINS, CLERK_SECRET_KEY, CLERK_JWKS_URL, CLERK_ISSUER, CLERK_JWKS_MIN_REFRESH_SECONDS, AUTH_TOKEN_CACHE_TTL_SECONDS
+
+# Margen para diferencias de reloj al validar exp/nbf/iat, igual que el SDK de Clerk (5 segundos)
+CLOCK_SKEW_SECONDS = 5
+
+
+@dataclass
+class AuthState:
+    is_signed_in: bool
+    payload: Optional[dict] = None
+
+
+# Cache de las llaves públicas (JWKS) de Clerk para todo el proceso.
+# Si llega un token con un kid que no conocemos se vuelve a pedir el JWKS (Clerk rotó las llaves),
+# pero como mucho una vez cada min_refresh_seconds para que un token inventado no nos haga spamear el endpoint.
+class JwksCache:
+    def __init__(self, url: str, secret_key: Optional[str], min_refresh_seconds: float = 30):
+        self.url = url
+        self.secret_key = secret_key
+        self.min_refresh_seconds = min_refresh_seconds
+        self._keys = {}
+        # -inf y no 0: con un reloj monotónico recién arrancado (contenedor o VM nuevos) el primer pedido
+        # del JWKS no puede quedar bloqueado por el mínimo entre refrescos
+        self._last_refresh = float("-inf")
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        headers = {"Authorization": f"Bearer {self.secret_key}"} if self.secret_key else {}
+        response = requests.get(self.url, headers=headers, timeout=5)
+        response.raise_for_status()
+        self._keys = {
+            jwk["kid"]: jwt.algorithms.RSAAlgorithm.from_jwk(jwk)
+            for jwk in response.json().get("keys", [])
+            if jwk.get("kid")
+        }
+        self._last_refresh = time.monotonic()
+
+    def get_key(self, kid: str):
+        key = self._keys.get(kid)
+        if key is not None:
+            return key
+        with self._lock:
+            # Otro hilo pudo haber refrescado mientras esperábamos el lock
+            if kid not in self._keys and time.monotonic() - self._last_refresh >= self.min_refresh_seconds:
+                self._refresh()
+            return self._keys.get(kid)
+
+
+# Cache de tokens ya verificados: hash del token -> (vence, payload).
+# Un token vive en el cache como mucho ttl_seconds y nunca más allá de su exp.
+class VerifiedTokenCache:
+    def __init__(self, ttl_seconds: float = 60, max_items: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_items = max_items
+        self._items = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        expires_at, payload = item
+        if expires_at < time.time():
+            with self._lock:
+                self._items.pop(key, None)
+            return None
+        return payload
+
+    def set(self, key: str, payload: dict) -> None:
+        expires_at = min(time.time() + self.ttl_seconds, payload.get("exp", 0))
+        with self._lock:
+            if len(self._items) >= self.max_items:
+                # Sacamos los vencidos y si sigue lleno el más viejo
+                now = time.time()
+                for old_key in [k for k, (exp, _) in self._items.items() if exp < now]:
+                    del self._items[old_key]
+                if len(self._items) >= self.max_items:
+                    self._items.pop(next(iter(self._items)))
+            self._items[key] = (expires_at, payload)
+
+
+jwks_cache = JwksCache(CLERK_JWKS_URL, CLERK_SECRET_KEY, CLERK_JWKS_MIN_REFRESH_SECONDS)
+token_cache = VerifiedTokenCache(AUTH_TOKEN_CACHE_TTL_SECONDS)
+
+
+# El token de sesión de Clerk viene en el header Authorization o en la cookie __session
+def _session_token(request: Request) -> Optional[str]:
+    authorization = request.headers.get("Authorization", "")
+    if authorization.startswith("Bearer "):
+        return authorization[len("Bearer "):].strip() or None
+    return request.cookies.get("__session")
+
+
+def verify_session_token(token: str) -> Optional[dict]:
+    token_key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    payload = token_cache.get(token_key)
+    if payload is not None:
+        return payload
+
+    try:
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = jwks_cache.get_key(kid) if kid else None
+        if key is None:
+            return None
+        payload = jwt.decode(token, key=key, algorithms=["RS256"], leeway=CLOCK_SKEW_SECONDS,
+                             issuer=CLERK_ISSUER, options={"require": ["exp", "iat"]})
+    except (jwt.PyJWTError, requests.RequestException):
+        return None
+
+    # Igual que authorized_parties en el SDK de Clerk: el azp tiene que ser uno de nuestros orígenes
+    azp = payload.get("azp")
+    if azp and azp not in ORIGINS:
+        return None
+
+    token_cache.set(token_key, payload)
+    return payload
+
+
+# Dependency de autenticación por request: verifica el token una sola vez y guarda
+# el resultado en request.state.auth, así las demás dependencies lo reutilizan.
+@perfilado("auth")
+def authenticate(request: Request) -> AuthState:
+    state = getattr(request.state, "auth", None)
+    if state is not None:
+        return state
+
+    token = _session_token(request)
+    payload = verify_session_token(token) if token else None
+    state = AuthState(is_signed_in=payload is not None, payload=payload)
+    request.state.auth = state
+    return state
+
 
 def request_state_payload(request: Request):
-    sdk = Clerk(bearer_auth=os.getenv('CLERK_SECRET_KEY'))
-    request_state = sdk.authenticate_request(
-        request,
-        AuthenticateRequestOptions(
-            authorized_parties=ORIGINS
-        )
-    )
-    return request_state.payload
\ No newline at end of file
+    return authenticate(request).payload
@@ -4,4 +4,101 @@ FRONTEND_URL = os.getenv("FRONTEND_URL")
 # Remover localhost:3000 cuando cambiemos a nestjs backend
 ORIGINS = ["http://localhost:3000", "http://localhost:3001", FRONTEND_URL]
 OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL", 'https://api.openai.com/v1')
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
\ No newline at end of file
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+# Autenticación con Clerk: de dónde se bajan las llaves públicas (se puede apuntar a un JWKS local para pruebas),
+# cada cuánto como mínimo se vuelve a pedir el JWKS ante un kid desconocido y cuánto vive un token verificado en cache
+CLERK_SECRET_KEY = os.getenv("CLERK_SECRET_KEY")
+CLERK_JWKS_URL = os.getenv("CLERK_JWKS_URL", "https://api.clerk.com/v1/jwks")
+# iss esperado en los tokens (la URL del Frontend API de Clerk, ej. https://clerk.midominio.com); sin definir no se valida
+CLERK_ISSUER = os.getenv("CLERK_ISSUER")
+CLERK_JWKS_MIN_REFRESH_SECONDS = int(os.getenv("CLERK_JWKS_MIN_REFRESH_SECONDS", 30))
+AUTH_TOKEN_CACHE_TTL_SECONDS = int(os.getenv("AUTH_TOKEN_CACHE_TTL_SECONDS", 60))
+
+# Análisis en lote: cuántas llamadas a GPT corren a la vez y cuántos CV se aceptan por petición
+BATCH_FEEDBACK_CONCURRENCY = int(os.getenv("BATCH_FEEDBACK_CONCURRENCY", 8))
+BATCH_MAX_FILES = int(os.getenv("BATCH_MAX_FILES", 200))
+
+# Cache del texto extraído de los CV: cuántos textos se guardan en memoria y, opcionalmente, un directorio
+# para el nivel persistente (si no se define, solo se usa la memoria).
+TEXT_CACHE_MAX_ITEMS = int(os.getenv("TEXT_CACHE_MAX_ITEMS", 512))
+TEXT_CACHE_DIR = os.getenv("TEXT_CACHE_DIR")
+
+# Extracción de texto en un pool de procesos: cuántos procesos (0 = sin pool, se usa el executor de hilos),
+# cuántos documentos se parsean a la vez como máximo (con pool no más que EXTRACTION_WORKERS) y cuánto puede
+# tardar el parseo de cada documento (sin contar la espera de un lugar libre)
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", os.cpu_count() or 1))
+EXTRACTION_MAX_CONCURRENCY = int(os.getenv("EXTRACTION_MAX_CONCURRENCY", EXTRACTION_WORKERS))
+EXTRACTION_TIMEOUT_SECONDS = float(os.getenv("EXTRACTION_TIMEOUT_SECONDS", 20))
+
+# Límite de tamaño de los CV subidos: por archivo y para el body completo de /analyze/batch/
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 10 * 1024 * 1024))
+MAX_BATCH_UPLOAD_BYTES = int(os.getenv("MAX_BATCH_UPLOAD_BYTES", 200 * 1024 * 1024))
+
+# Cache de respuestas de OpenAI (LLM_CACHE_MAX_ITEMS=0 lo desactiva)
+LLM_CACHE_MAX_ITEMS = int(os.getenv("LLM_CACHE_MAX_ITEMS", 1024))
+LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", 24 * 60 * 60))
+# Si una respuesta sacada del cache en /feedbackCandidate/ cuenta como un uso del candidato
+FEEDBACK_CANDIDATE_CACHE_HIT_COUNTS_USAGE = os.getenv("FEEDBACK_CANDIDATE_CACHE_HIT_COUNTS_USAGE", "true").lower() == "true"
+
+# Puntaje del CV: "single" codifica el CV entero (el modelo lo corta en 256 word pieces) y "chunked" lo divide
+# en ventanas de palabras que se solapan y junta la similitud con max o mean. ENCODE_BATCH_SIZE y
+# CHUNK_MAX_WINDOWS acotan el costo en CPU.
+SCORING_MODE = os.getenv("SCORING_MODE", "single")
+CHUNK_WORDS = int(os.getenv("CHUNK_WORDS", 160))
+CHUNK_OVERLAP_WORDS = int(os.getenv("CHUNK_OVERLAP_WORDS", 40))
+CHUNK_MAX_WINDOWS = int(os.getenv("CHUNK_MAX_WINDOWS", 16))
+CHUNK_POOLING = os.getenv("CHUNK_POOLING", "max")
+ENCODE_BATCH_SIZE = int(os.getenv("ENCODE_BATCH_SIZE", 32))
+
+# Backend del encoder de oraciones: "torch", "onnx" u "onnx-int8" (ver encoder.py).
+# ENCODER_EXPORT_DIR es donde se guarda el modelo int8 si hay que cuantizarlo localmente.
+ENCODER_BACKEND = os.getenv("ENCODER_BACKEND", "torch")
+ENCODER_ONNX_FILE = os.getenv("ENCODER_ONNX_FILE")
+ENCODER_EXPORT_DIR = os.getenv("ENCODER_EXPORT_DIR")
+
+# Cuánto espera un request que necesita el modelo mientras se está cargando antes de responder 503
+MODEL_READY_TIMEOUT_SECONDS = float(os.getenv("MODEL_READY_TIMEOUT_SECONDS", 30))
+
+# Índice de vectores de los CV analizados (memory-mapped). Si no se define el directorio queda desactivado.
+VECTOR_INDEX_DIR = os.getenv("VECTOR_INDEX_DIR")
+VECTOR_INDEX_DTYPE = os.getenv("VECTOR_INDEX_DTYPE", "float16")
+
+# Micro-batching de embeddings: los pedidos de encode que llegan dentro de EMBED_BATCH_MAX_WAIT_MS
+# se juntan en un solo model.encode de hasta EMBED_BATCH_MAX_SIZE textos
+EMBED_BATCH_MAX_SIZE = int(os.getenv("EMBED_BATCH_MAX_SIZE", 64))
+EMBED_BATCH_MAX_WAIT_MS = float(os.getenv("EMBED_BATCH_MAX_WAIT_MS", 5))
+
+# Análisis asíncronos (/analyze/tareas/): cuántos workers toman tareas de la cola en cada proceso,
+# cada cuánto revisan la tabla si no les avisaron, después de cuántos segundos sin latido una tarea
+# "procesando" se considera abandonada (el worker murió) y cuántas veces se reintenta
+ANALYSIS_TASK_WORKERS = int(os.getenv("ANALYSIS_TASK_WORKERS", 2))
+ANALYSIS_TASK_POLL_SECONDS = float(os.getenv("ANALYSIS_TASK_POLL_SECONDS", 2))
+ANALYSIS_TASK_LEASE_SECONDS = int(os.getenv("ANALYSIS_TASK_LEASE_SECONDS", 300))
+ANALYSIS_TASK_MAX_ATTEMPTS = int(os.getenv("ANALYSIS_TASK_MAX_ATTEMPTS", 3))
+
+# Importación masiva del catálogo de trabajos (/trabajos/importar/): máximo de filas por archivo
+IMPORT_MAX_ROWS = int(os.getenv("IMPORT_MAX_ROWS", 5000))
+
+# Gateway de OpenAI: llamadas en vuelo a la vez, límites de nuestro tier (pedidos y tokens por minuto, 0 = sin límite),
+# reintentos con backoff exponencial y tiempo máximo total por pedido (espera de cupo + reintentos incluidos)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 16))
+LLM_REQUESTS_PER_MINUTE = float(os.getenv("LLM_REQUESTS_PER_MINUTE", 500))
+LLM_TOKENS_PER_MINUTE = float(os.getenv("LLM_TOKENS_PER_MINUTE", 200000))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", 4))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", 0.5))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", 20))
+LLM_DEADLINE_SECONDS = float(os.getenv("LLM_DEADLINE_SECONDS", 60))
+
+# Header Server-Timing con el tiempo de cada etapa del request. SERVER_TIMING_DEBUG permite además pedir el
+# detalle completo en el JSON de la respuesta con el header X-Debug-Timing: 1 (no activarlo en producción).
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+SERVER_TIMING_DEBUG = os.getenv("SERVER_TIMING_DEBUG", "false").lower() == "true"
+
+# Logs en JSON escritos por un thread aparte (ver logging_config.py). Los payloads largos (feedback de GPT,
+# datos de un form) se guardan solo en una fracción LOG_PAYLOAD_SAMPLE_RATE de los registros, recortados.
+# Si la cola del thread escritor se llena, los registros nuevos se descartan en vez de frenar el event loop.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_PAYLOAD_SAMPLE_RATE = float(os.getenv("LOG_PAYLOAD_SAMPLE_RATE", 0.01))
+LOG_PAYLOAD_MAX_CHARS = int(os.getenv("LOG_PAYLOAD_MAX_CHARS", 2000))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
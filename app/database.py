@@ -1,25 +1,56 @@
-from sqlalchemy import create_engine, Column, String, Integer, ForeignKey, Text, DateTime, Float, Date
+from sqlalchemy import create_engine, Column, String, Integer, ForeignKey, Text, DateTime, Float, Date, LargeBinary, Index, Computed
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from datetime import datetime
+import logging
 import os
 from dotenv import load_dotenv
 
 # Cargar variables de entorno
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Obtener la URL de PostgreSQL
 DATABASE_URL = os.getenv("DATABASE_URL")
-print ("DATABASE_URL:", DATABASE_URL)
 
 # Verificar que DATABASE_URL se cargó correctamente
 if not DATABASE_URL:
     raise ValueError("ERROR: La variable de entorno DATABASE_URL no está configurada correctamente.")
 
 
+# Tamaño del pool de conexiones (se aplica al engine síncrono y al asíncrono por separado).
+# pool_pre_ping descarta las conexiones que el servidor cerró antes de usarlas.
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 10))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))
+POOL_SETTINGS = dict(
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+)
+
+# La misma base de datos pero con el driver asyncpg, para los endpoints async
+def async_database_url(url: str) -> str:
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
 # Configurar SQLAlchemy
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **POOL_SETTINGS)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Engine y sesiones asíncronas: las consultas no bloquean el event loop mientras esperan a Postgres
+async_engine = create_async_engine(async_database_url(DATABASE_URL), **POOL_SETTINGS)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 #Modelo Cliente
@@ -41,6 +72,7 @@ class Job(Base):
     skills = relationship("Skill", back_populates="job", cascade="all, delete")
     functions = relationship("Function", back_populates="job", cascade="all, delete")
     profile = relationship("Profile", back_populates="job", cascade="all, delete")
+    embedding = relationship("JobEmbedding", back_populates="job", uselist=False, cascade="all, delete")
 
 #Modelo Funciones del Trabajo
 class Function(Base):
@@ -69,20 +101,71 @@ class Skill(Base):
 
     job = relationship("Job", back_populates="skills")
     
+#Embeddings precalculados del trabajo (funciones y perfil) para no volver a codificarlos en cada análisis.
+# Los vectores se guardan como bytes float32 y texto_hash nos dice si las funciones/perfil cambiaron.
+class JobEmbedding(Base):
+    __tablename__ = "embeddings_de_trabajo"
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("tipos_de_trabajo.id", ondelete="CASCADE"), nullable=False, unique=True)
+    model_name = Column(String, nullable=False)
+    texto_hash = Column(String(64), nullable=False)
+    funciones_embedding = Column(LargeBinary, nullable=False)
+    perfil_embedding = Column(LargeBinary, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    job = relationship("Job", back_populates="embedding")
+
 #Analisis
 class Analize(Base):
     __tablename__ = "analisis"
     id = Column(Integer, primary_key=True, index=True)
-    feedback = Column(Text, index=True, nullable=False)
+    # NULL si GPT no pudo generar el feedback (en el análisis en lote el resto del análisis se guarda igual)
+    feedback = Column(Text, nullable=True)
     match_score = Column(Float)
     decision = Column(String)
     file_name = Column(String)
     job_title = Column(String)
     name = Column(String)
     created_at = Column(DateTime, default=datetime.now())
+    # Columna generada por Postgres para la búsqueda de texto completo sobre el feedback (en español)
+    feedback_tsv = Column(TSVECTOR, Computed("to_tsvector('spanish', coalesce(feedback, ''))", persisted=True))
+
+    # Índices trigram (pg_trgm) para que los filtros ilike('%...%') de /analisis/ no recorran toda la tabla
+    __table_args__ = (
+        Index("ix_analisis_name_trgm", "name", postgresql_using="gin", postgresql_ops={"name": "gin_trgm_ops"}),
+        Index("ix_analisis_job_title_trgm", "job_title", postgresql_using="gin", postgresql_ops={"job_title": "gin_trgm_ops"}),
+        Index("ix_analisis_feedback_tsv", "feedback_tsv", postgresql_using="gin"),
+    )
     
     
 
+# Cola persistente de análisis asíncronos (/analyze/tareas/). El CV se guarda en la fila así un worker
+# puede retomarlo aunque el proceso que lo recibió se reinicie. estado: pendiente, procesando, completado o error;
+# etapa es el progreso dentro del procesamiento y locked_at el último latido del worker que la tiene tomada.
+class AnalysisTask(Base):
+    __tablename__ = "tareas_de_analisis"
+    id = Column(Integer, primary_key=True, index=True)
+    estado = Column(String, nullable=False, default="pendiente")
+    etapa = Column(String, nullable=False, default="en_cola")
+    client_id = Column(Integer, ForeignKey("clientes.id", ondelete="CASCADE"), nullable=False)
+    job_id = Column(Integer, ForeignKey("tipos_de_trabajo.id", ondelete="CASCADE"), nullable=False)
+    nombre_del_candidato = Column(String, nullable=False)
+    file_name = Column(String, nullable=False)
+    file_data = Column(LargeBinary, nullable=True)
+    intentos = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    locked_at = Column(DateTime, nullable=True)
+    analisis_id = Column(Integer, ForeignKey("analisis.id", ondelete="SET NULL"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    analisis = relationship("Analize")
+
+    __table_args__ = (
+        Index("ix_tareas_de_analisis_estado", "estado", "id"),
+    )
+
+
 # tabla del  candidato
 class Candidate(Base):
      __tablename__ = "candidatos"
@@ -134,9 +217,10 @@ class Contact(Base):
         
 #Crear las tablas en PostgreSQL
 def create_tables():
-    print("Creando tablas en la base de datos...")
+    logger.info("Creando tablas en la base de datos...")
     Base.metadata.create_all(bind=engine)
-    print("¡Tablas creadas correctamente!")
+    logger.info("¡Tablas creadas correctamente!")
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     create_tables()
@@ -0,0 +1,104 @@
+import asyncio
+import threading
+from concurrent.futures import Executor
+from typing import Callable, List, Optional
+
+import numpy as np
+
+
+# Servicio de embeddings con micro-batching: junta los pedidos de encode que llegan casi al mismo tiempo
+# (hasta max_wait_ms o hasta max_batch_size textos) y los manda en un solo model.encode, que es
+# mucho más eficiente que varios encode chiquitos. Cada coroutine recibe solo las filas de sus textos.
+# Un pedido que ya trae más de max_batch_size textos se codifica solo en su propio lote.
+class EmbeddingBatcher:
+    def __init__(self, encode_fn: Callable[[List[str]], np.ndarray], max_batch_size: int = 64, max_wait_ms: float = 5, executor: Optional[Executor] = None):
+        self.encode_fn = encode_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.executor = executor
+        self._queue = None
+        self._worker = None
+        self._loop = None
+        self._stats_lock = threading.Lock()
+        self._lotes = 0
+        self._pedidos = 0
+        self._textos = 0
+        self._suma_llenado = 0.0
+        self._ultimo_llenado = 0.0
+
+    def _ensure_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def encode(self, texts: List[str]) -> np.ndarray:
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((texts, future))
+        return await future
+
+    def close(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            lote = [await self._queue.get()]
+            cantidad = len(lote[0][0])
+            deadline = loop.time() + self.max_wait
+            while cantidad < self.max_batch_size:
+                restante = deadline - loop.time()
+                if restante <= 0:
+                    break
+                try:
+                    pedido = await asyncio.wait_for(self._queue.get(), timeout=restante)
+                except asyncio.TimeoutError:
+                    break
+                lote.append(pedido)
+                cantidad += len(pedido[0])
+
+            textos = [texto for textos_pedido, _ in lote for texto in textos_pedido]
+            try:
+                embeddings = await loop.run_in_executor(self.executor, self.encode_fn, textos)
+            except Exception as e:
+                for _, future in lote:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self._registrar(len(lote), cantidad)
+            inicio = 0
+            for textos_pedido, future in lote:
+                # Si el request se canceló mientras esperaba, su future ya está terminado
+                if not future.done():
+                    future.set_result(embeddings[inicio:inicio + len(textos_pedido)])
+                inicio += len(textos_pedido)
+
+    def _registrar(self, pedidos: int, textos: int) -> None:
+        llenado = min(textos / self.max_batch_size, 1.0)
+        with self._stats_lock:
+            self._lotes += 1
+            self._pedidos += pedidos
+            self._textos += textos
+            self._suma_llenado += llenado
+            self._ultimo_llenado = llenado
+
+    # Métricas de llenado de los lotes: cuántos lotes, pedidos y textos se procesaron y qué tan llenos iban
+    def stats(self) -> dict:
+        with self._stats_lock:
+            lotes = self._lotes or 1
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+                "lotes": self._lotes,
+                "pedidos": self._pedidos,
+                "textos": self._textos,
+                "pedidos_por_lote": self._pedidos / lotes,
+                "textos_por_lote": self._textos / lotes,
+                "llenado_promedio": self._suma_llenado / lotes,
+                "ultimo_llenado": self._ultimo_llenado,
+            }
@@ -0,0 +1,111 @@
+import argparse
+import os
+from typing import Optional
+
+import numpy as np
+
+# Backends del encoder de oraciones:
+#   - "torch": SentenceTransformer normal en fp32 con PyTorch (el de siempre)
+#   - "onnx": el mismo modelo exportado a ONNX y corrido con ONNX Runtime
+#   - "onnx-int8": ONNX con cuantización dinámica a int8, el más rápido y liviano en CPU
+# Los backends ONNX necesitan optimum[onnxruntime] (ver requirements-cpu.txt).
+BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# Archivo int8 que ya viene publicado en el repo del modelo en Hugging Face
+DEFAULT_INT8_FILE = "onnx/model_qint8_avx512_vnni.onnx"
+
+
+# Identificador del encoder para guardar junto a los embeddings: vectores de backends distintos
+# no son exactamente iguales, así que los de otro backend se recalculan.
+def encoder_id(model_name: str, backend: str) -> str:
+    return model_name if backend == "torch" else f"{model_name}+{backend}"
+
+
+# sentence_transformers (y con él torch) se importa recién al cargar el encoder, no al importar este módulo
+def cargar_encoder(model_name: str, backend: str = "torch", onnx_file: Optional[str] = None, export_dir: Optional[str] = None):
+    from sentence_transformers import SentenceTransformer
+
+    if backend not in BACKENDS:
+        raise ValueError(f"ENCODER_BACKEND debe ser uno de {BACKENDS}, no {backend!r}")
+    if backend == "torch":
+        return SentenceTransformer(model_name)
+    if backend == "onnx":
+        return SentenceTransformer(model_name, backend="onnx", device="cpu")
+
+    onnx_file = onnx_file or DEFAULT_INT8_FILE
+    try:
+        return SentenceTransformer(model_name, backend="onnx", device="cpu", model_kwargs={"file_name": onnx_file})
+    except Exception:
+        if not export_dir:
+            raise
+    # Si el archivo int8 no está publicado lo cuantizamos nosotros una vez y lo dejamos en export_dir
+    return exportar_int8(model_name, export_dir)
+
+
+def exportar_int8(model_name: str, export_dir: str):
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    file_name = "onnx/model_qint8_avx2.onnx"
+    if not os.path.exists(os.path.join(export_dir, file_name)):
+        onnx_model = SentenceTransformer(model_name, backend="onnx", device="cpu")
+        onnx_model.save(export_dir)
+        export_dynamic_quantized_onnx_model(onnx_model, "avx2", export_dir)
+    return SentenceTransformer(export_dir, backend="onnx", device="cpu", model_kwargs={"file_name": file_name})
+
+
+# Chequeo de exactitud: compara los puntajes coseno del backend elegido contra torch sobre pares de textos.
+# Se corre con: python encoder.py --backend onnx-int8
+def comparar_con_torch(model_name: str, backend: str, pares, onnx_file: Optional[str] = None, export_dir: Optional[str] = None) -> dict:
+    referencia = cargar_encoder(model_name, "torch")
+    candidato = cargar_encoder(model_name, backend, onnx_file, export_dir)
+
+    def puntajes(encoder) -> np.ndarray:
+        a = encoder.encode([p[0] for p in pares], convert_to_numpy=True, normalize_embeddings=True)
+        b = encoder.encode([p[1] for p in pares], convert_to_numpy=True, normalize_embeddings=True)
+        return np.sum(a * b, axis=1)
+
+    esperado, obtenido = puntajes(referencia), puntajes(candidato)
+    diferencias = np.abs(esperado - obtenido)
+    return {
+        "backend": backend,
+        "pares": len(pares),
+        "max_abs_diff": float(diferencias.max()),
+        "mean_abs_diff": float(diferencias.mean()),
+        # Lo que importa para la decisión: cuántas veces el puntaje cruza al otro lado de los umbrales 0.5 y 0.6
+        "decisiones_distintas": int(np.sum((esperado >= 0.5) != (obtenido >= 0.5)) + np.sum((esperado >= 0.6) != (obtenido >= 0.6))),
+    }
+
+
+PARES_DE_PRUEBA = [
+    ("desarrollador backend con 5 años de experiencia en python, fastapi y postgresql",
+     "desarrollar y mantener apis rest, diseñar bases de datos relacionales"),
+    ("contador público con experiencia en auditoría y declaraciones de impuestos",
+     "desarrollar y mantener apis rest, diseñar bases de datos relacionales"),
+    ("enfermera con 10 años en cuidados intensivos y manejo de pacientes críticos",
+     "atención de pacientes en unidad de cuidados intensivos, administración de medicamentos"),
+    ("diseñador gráfico, adobe illustrator, photoshop, branding y redes sociales",
+     "crear piezas gráficas para campañas en redes sociales"),
+    ("ingeniero de datos, spark, airflow, kubernetes y aws",
+     "construir pipelines de datos y orquestar procesos etl en la nube"),
+    ("vendedor con experiencia en atención al cliente y cierre de ventas",
+     "gestionar cartera de clientes y alcanzar metas comerciales mensuales"),
+    ("estudiante de administración de empresas sin experiencia laboral",
+     "liderar un equipo de 20 personas en operaciones logísticas"),
+    ("docente de matemáticas de secundaria con maestría en educación",
+     "planificar clases de álgebra y geometría para estudiantes de 14 a 17 años"),
+]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compara los puntajes coseno de un backend del encoder contra torch")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2")
+    parser.add_argument("--backend", default="onnx-int8", choices=BACKENDS)
+    parser.add_argument("--onnx-file", default=None)
+    parser.add_argument("--export-dir", default=None)
+    parser.add_argument("--tolerancia", type=float, default=0.05, help="diferencia absoluta máxima aceptada")
+    args = parser.parse_args()
+
+    resultado = comparar_con_torch(args.model, args.backend, PARES_DE_PRUEBA, args.onnx_file, args.export_dir)
+    print(resultado)
+    if resultado["max_abs_diff"] > args.tolerancia:
+        raise SystemExit(f"La diferencia máxima {resultado['max_abs_diff']:.4f} supera la tolerancia {args.tolerancia}")
@@ -0,0 +1,109 @@
+import asyncio
+import io
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+import PyPDF2
+import docx2txt
+
+
+# Extraer el texto de un PDF o DOCX a partir de sus bytes.
+# Está en su propio módulo (y no en main.py) para que los procesos del pool lo puedan importar
+# sin cargar FastAPI ni el modelo de sentence_transformers.
+def extract_text_from_bytes(data: bytes, filename: str) -> str:
+    text = ""
+    if filename.lower().endswith(".pdf"):
+        pdf_reader = PyPDF2.PdfReader(io.BytesIO(data))
+        # extract_text se llama una sola vez por página
+        text = " ".join(page_text for page_text in (page.extract_text() for page in pdf_reader.pages) if page_text)
+    elif filename.lower().endswith(".docx"):
+        text = docx2txt.process(io.BytesIO(data))
+    return text.lower()  # Convertir todo a minúsculas para evitar errores de coincidencia
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+# El archivo no se pudo parsear: PDF o DOCX corrupto aunque la cabecera sea válida
+class ArchivoIlegible(Exception):
+    pass
+
+
+# Pool de procesos para parsear los CV fuera del event loop (y fuera del GIL).
+# max_concurrency limita cuántos documentos se están parseando a la vez (con pool nunca más que workers, así
+# un documento que tiene lugar en el semáforo tiene un proceso libre). La espera de un lugar no tiene límite
+# y el timeout empieza a correr recién con el lugar tomado, así un lote grande no hace fallar a los documentos
+# que solo estaban en la fila. Si un documento que se estaba parseando se pasa del timeout se recicla el pool
+# (se terminan sus procesos), porque un proceso colgado en un PDF patológico no se libera solo. Si un proceso
+# muere (OOM, SIGKILL) el ProcessPoolExecutor queda roto para siempre: también se recicla y el documento se
+# reintenta una vez.
+# Con workers=0 no se crea el pool y se parsea en el executor de hilos que se pase (comportamiento anterior);
+# ahí el timeout solo deja de esperar, un hilo no se puede terminar.
+class ExtractionPool:
+    def __init__(self, workers: int, max_concurrency: int, timeout_seconds: float, fallback_executor: Optional[Executor] = None):
+        self.workers = workers
+        self.max_concurrency = min(max_concurrency, workers) if workers > 0 else max_concurrency
+        self.timeout_seconds = timeout_seconds
+        self.fallback_executor = fallback_executor
+        self._pool = None
+        self._semaphore = None
+
+    def _executor(self) -> Optional[Executor]:
+        if self.workers <= 0:
+            return self.fallback_executor
+        if self._pool is None:
+            # forkserver para no heredar los hilos de torch del proceso principal
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload(["extraction"])
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+        return self._pool
+
+    # Descarta el pool (si sigue siendo el actual) y termina sus procesos; el próximo pedido crea uno nuevo.
+    # Los otros documentos que estaban en ese pool terminan con BrokenProcessPool y se reintentan en el nuevo.
+    def _reciclar(self, pool: Optional[Executor]) -> None:
+        if pool is None or pool is not self._pool:
+            return
+        self._pool = None
+        procesos = list((pool._processes or {}).values())
+        pool.shutdown(wait=False, cancel_futures=True)
+        for proceso in procesos:
+            if proceso.is_alive():
+                proceso.terminate()
+
+    async def extract(self, data: bytes, filename: str) -> str:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._semaphore:
+            executor = future = None
+            try:
+                async with asyncio.timeout(self.timeout_seconds):
+                    for intento in range(2):
+                        executor = self._executor()
+                        future = None
+                        try:
+                            if executor is None:
+                                return await loop.run_in_executor(None, extract_text_from_bytes, data, filename)
+                            future = executor.submit(extract_text_from_bytes, data, filename)
+                            return await asyncio.wrap_future(future)
+                        except BrokenProcessPool:
+                            self._reciclar(executor)
+                            if intento:
+                                raise ArchivoIlegible(f"El proceso que parseaba {filename} terminó inesperadamente")
+                        except Exception as e:
+                            raise ArchivoIlegible(f"No se pudo leer {filename}: {e}") from e
+            except TimeoutError:
+                # Si el documento ya estaba en un proceso lo sigue ocupando: se recicla el pool para liberarlo.
+                # Si todavía no había arrancado alcanza con cancelarlo y los demás documentos siguen en el pool.
+                if future is not None and not future.cancel():
+                    self._reciclar(executor)
+                raise ExtractionTimeout(f"La extracción de {filename} superó {self.timeout_seconds} segundos")
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
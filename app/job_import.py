@@ -0,0 +1,143 @@
+import csv
+import io
+import json
+from typing import List
+
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import Client, Function, Job, Profile, Skill
+
+# Mismos campos que el form de /agregar_trabajo/
+CAMPOS = ("nombre_del_cliente", "titulo_de_trabajo", "perfil_del_trabajador", "funciones_del_trabajo", "habilidades")
+CAMPOS_OBLIGATORIOS = ("nombre_del_cliente", "titulo_de_trabajo", "funciones_del_trabajo")
+
+
+class ImportacionInvalida(ValueError):
+    pass
+
+
+# Lee el catálogo de trabajos de un CSV (con encabezados = CAMPOS) o de un JSON con una lista de objetos
+def leer_filas(data: bytes, filename: str) -> List[dict]:
+    try:
+        texto = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise ImportacionInvalida("El archivo tiene que estar en UTF-8.")
+
+    if filename.lower().endswith(".json"):
+        try:
+            filas = json.loads(texto)
+        except json.JSONDecodeError as e:
+            raise ImportacionInvalida(f"JSON inválido: {e}")
+        if not isinstance(filas, list):
+            raise ImportacionInvalida("El JSON tiene que ser una lista de trabajos.")
+        return filas
+
+    if filename.lower().endswith(".csv"):
+        reader = csv.DictReader(io.StringIO(texto))
+        faltantes = [campo for campo in CAMPOS_OBLIGATORIOS if campo not in (reader.fieldnames or [])]
+        if faltantes:
+            raise ImportacionInvalida(f"Faltan columnas en el CSV: {', '.join(faltantes)}")
+        return list(reader)
+
+    raise ImportacionInvalida("Solo se aceptan archivos CSV o JSON.")
+
+
+# funciones_del_trabajo y habilidades pueden venir como texto separado por comas (igual que en el form) o como lista
+def _lista(valor) -> List[str]:
+    if valor is None:
+        return []
+    if isinstance(valor, str):
+        valor = valor.split(",")
+    if not isinstance(valor, list):
+        raise ValueError(f"tiene que ser texto separado por comas o una lista, no {type(valor).__name__}")
+    return [str(item).strip() for item in valor if str(item).strip()]
+
+
+# Valida y normaliza una fila. Devuelve el trabajo listo para insertar o lanza ValueError con el motivo.
+def normalizar_fila(fila) -> dict:
+    if not isinstance(fila, dict):
+        raise ValueError("cada trabajo tiene que ser un objeto")
+    # Primero lo que falta, después los tipos y por último lo vacío, así cada error dice qué corregir
+    for campo in CAMPOS_OBLIGATORIOS:
+        if fila.get(campo) is None:
+            raise ValueError(f"falta {campo}")
+
+    for campo in ("nombre_del_cliente", "titulo_de_trabajo", "perfil_del_trabajador"):
+        if fila.get(campo) is not None and not isinstance(fila[campo], str):
+            raise ValueError(f"{campo} tiene que ser texto, no {type(fila[campo]).__name__}")
+    listas = {}
+    for campo in ("funciones_del_trabajo", "habilidades"):
+        try:
+            listas[campo] = _lista(fila.get(campo))
+        except ValueError as e:
+            raise ValueError(f"{campo} {e}")
+
+    nombre_del_cliente = fila["nombre_del_cliente"].strip()
+    titulo_de_trabajo = fila["titulo_de_trabajo"].strip()
+    if not nombre_del_cliente:
+        raise ValueError("nombre_del_cliente no puede estar vacío")
+    if not titulo_de_trabajo:
+        raise ValueError("titulo_de_trabajo no puede estar vacío")
+    funciones, habilidades = listas["funciones_del_trabajo"], listas["habilidades"]
+    if not funciones:
+        raise ValueError("funciones_del_trabajo no puede estar vacío")
+
+    return {
+        "nombre_del_cliente": nombre_del_cliente,
+        "titulo_de_trabajo": titulo_de_trabajo,
+        "perfil_del_trabajador": (fila.get("perfil_del_trabajador") or "").strip(),
+        "funciones": funciones,
+        "habilidades": habilidades,
+    }
+
+
+# Inserta todos los trabajos válidos en una sola transacción con inserts por conjunto:
+# un INSERT ... ON CONFLICT DO NOTHING para los clientes, un INSERT ... RETURNING para los trabajos
+# y un executemany para habilidades, funciones y perfiles. Las filas inválidas no se insertan y se reportan.
+async def importar_trabajos(db: AsyncSession, filas: list) -> dict:
+    trabajos, errores = [], []
+    for numero, fila in enumerate(filas, start=1):
+        try:
+            trabajos.append((numero, normalizar_fila(fila)))
+        except ValueError as e:
+            errores.append({"fila": numero, "error": str(e)})
+
+    if not trabajos:
+        return {"creados": 0, "clientes_nuevos": 0, "trabajos": [], "errores": errores}
+
+    nombres = sorted({trabajo["nombre_del_cliente"] for _, trabajo in trabajos})
+    existentes = set((await db.scalars(select(Client.name).where(Client.name.in_(nombres)))).all())
+    insert_dialecto = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+    await db.execute(
+        insert_dialecto(Client).on_conflict_do_nothing(index_elements=["name"]),
+        [{"name": nombre} for nombre in nombres],
+    )
+    client_ids = dict((await db.execute(select(Client.name, Client.id).where(Client.name.in_(nombres)))).all())
+
+    job_ids = (await db.scalars(
+        insert(Job).returning(Job.id, sort_by_parameter_order=True),
+        [{"title": trabajo["titulo_de_trabajo"], "client_id": client_ids[trabajo["nombre_del_cliente"]]} for _, trabajo in trabajos],
+    )).all()
+
+    skills, functions, profiles = [], [], []
+    for job_id, (_, trabajo) in zip(job_ids, trabajos):
+        skills.extend({"name": nombre, "job_id": job_id} for nombre in trabajo["habilidades"])
+        functions.extend({"title": titulo, "job_id": job_id} for titulo in trabajo["funciones"])
+        profiles.append({"name": trabajo["perfil_del_trabajador"], "job_id": job_id})
+    for modelo, valores in ((Skill, skills), (Function, functions), (Profile, profiles)):
+        if valores:
+            await db.execute(insert(modelo), valores)
+    await db.commit()
+
+    return {
+        "creados": len(job_ids),
+        "clientes_nuevos": len(set(nombres) - existentes),
+        "trabajos": [
+            {"fila": numero, "job_id": job_id, "client_id": client_ids[trabajo["nombre_del_cliente"]], "titulo_de_trabajo": trabajo["titulo_de_trabajo"]}
+            for job_id, (numero, trabajo) in zip(job_ids, trabajos)
+        ],
+        "errores": errores,
+    }
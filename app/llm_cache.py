@@ -0,0 +1,45 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+# Cache de respuestas de OpenAI. La clave es un hash del modelo, el prompt de sistema y el prompt
+# del usuario ya armado, así el mismo CV para el mismo trabajo/profesión no vuelve a llamar a la API.
+# Las entradas vencen después de ttl_seconds y cuando se pasa de max_items se saca la menos usada.
+class ResponseCache:
+    def __init__(self, max_items: int = 1024, ttl_seconds: float = 3600):
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(model: str, system_prompt: str, user_prompt: str) -> str:
+        digest = hashlib.sha256()
+        for part in (model, system_prompt, user_prompt):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._items[key]
+                return None
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str) -> None:
+        if self.max_items <= 0:
+            return
+        with self._lock:
+            self._items[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
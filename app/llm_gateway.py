@@ -0,0 +1,165 @@
+import asyncio
+import random
+import time
+from typing import Optional
+
+import openai
+
+
+# No se pudo obtener respuesta de OpenAI: se agotaron los reintentos o el deadline del pedido.
+# retry_after es una sugerencia (en segundos) para el header Retry-After de nuestra propia respuesta.
+class LLMNoDisponible(Exception):
+    def __init__(self, mensaje: str, retry_after: Optional[float] = None):
+        super().__init__(mensaje)
+        self.retry_after = retry_after
+
+
+# OpenAI cortó la respuesta en stream sin completarla (evento response.failed o response.incomplete,
+# que el SDK no levanta como error): lo que llegó hasta ahí no se puede usar ni guardar
+class LLMRespuestaIncompleta(Exception):
+    pass
+
+
+# Token bucket: se recargan `rate` tokens por segundo hasta `capacity`. acquire espera (sin bloquear
+# el event loop) hasta que haya tokens suficientes. El lock mantiene el orden de llegada.
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        ahora = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (ahora - self._updated) * self.rate)
+        self._updated = ahora
+
+    async def acquire(self, tokens: float = 1, deadline: Optional[float] = None) -> None:
+        tokens = min(tokens, self.capacity)
+        async with self._lock:
+            self._refill()
+            while self._tokens < tokens:
+                espera = (tokens - self._tokens) / self.rate
+                if deadline is not None and time.monotonic() + espera > deadline:
+                    raise LLMNoDisponible("Límite de uso de OpenAI: no hay cupo antes del deadline", retry_after=espera)
+                await asyncio.sleep(espera)
+                self._refill()
+            self._tokens -= tokens
+
+
+# Errores de OpenAI que vale la pena reintentar: 429, 5xx, timeouts y errores de conexión
+ERRORES_REINTENTABLES = (
+    openai.RateLimitError,
+    openai.InternalServerError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+)
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            return float(headers["retry-after"])
+    except ValueError:
+        return None
+    return None
+
+
+# Gateway único para todas las llamadas a la Responses API:
+#   - un semáforo global limita cuántas llamadas hay en vuelo a la vez
+#   - dos token buckets (pedidos y tokens por minuto) siguen los límites de nuestro tier de OpenAI
+#   - reintentos con backoff exponencial con jitter, respetando Retry-After cuando OpenAI lo manda
+#   - un deadline por pedido: ni la espera de cupo ni los reintentos pueden pasarse de ese tiempo
+# El cliente de OpenAI tiene que crearse con max_retries=0, los reintentos los maneja el gateway.
+class LLMGateway:
+    def __init__(
+        self,
+        client,
+        max_concurrency: int = 16,
+        requests_per_minute: float = 500,
+        tokens_per_minute: float = 200000,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 20,
+        deadline_seconds: float = 60,
+        output_tokens_estimados: int = 800,
+    ):
+        self.client = client
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.deadline_seconds = deadline_seconds
+        self.output_tokens_estimados = output_tokens_estimados
+        self._semaforo = asyncio.Semaphore(max_concurrency)
+        # Capacidad de 10 segundos de cupo: permite ráfagas cortas sin pasarse del promedio por minuto
+        self._pedidos = TokenBucket(requests_per_minute / 60, max(1.0, requests_per_minute / 6)) if requests_per_minute > 0 else None
+        self._tokens = TokenBucket(tokens_per_minute / 60, max(1.0, tokens_per_minute / 6)) if tokens_per_minute > 0 else None
+        self.en_vuelo = 0
+
+    # Estimación gruesa de tokens del pedido (~4 caracteres por token) más la salida esperada
+    def _tokens_estimados(self, input) -> int:
+        caracteres = sum(len(mensaje.get("content", "")) for mensaje in input) if isinstance(input, list) else len(str(input))
+        return caracteres // 4 + self.output_tokens_estimados
+
+    def _backoff(self, intento: int, error: Exception) -> float:
+        espera = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** intento))
+        retry_after = _retry_after(error)
+        if retry_after is not None:
+            espera = max(espera, retry_after)
+        return espera
+
+    async def _esperar_cupo(self, kwargs: dict, deadline: float) -> None:
+        if self._pedidos is not None:
+            await self._pedidos.acquire(1, deadline)
+        if self._tokens is not None:
+            await self._tokens.acquire(self._tokens_estimados(kwargs.get("input", "")), deadline)
+
+    async def _llamar(self, deadline: float, **kwargs):
+        intento = 0
+        while True:
+            await self._esperar_cupo(kwargs, deadline)
+            restante = deadline - time.monotonic()
+            if restante <= 0:
+                raise LLMNoDisponible("Se agotó el tiempo para responder de OpenAI")
+            try:
+                return await self.client.responses.create(timeout=restante, **kwargs)
+            except ERRORES_REINTENTABLES as e:
+                espera = self._backoff(intento, e)
+                intento += 1
+                if intento > self.max_retries or time.monotonic() + espera >= deadline:
+                    raise LLMNoDisponible(f"OpenAI no está disponible: {e}", retry_after=_retry_after(e)) from e
+                await asyncio.sleep(espera)
+
+    # responses.create con concurrencia, cupo, reintentos y deadline
+    async def create(self, deadline_seconds: Optional[float] = None, **kwargs):
+        deadline = time.monotonic() + (deadline_seconds or self.deadline_seconds)
+        async with self._semaforo:
+            self.en_vuelo += 1
+            try:
+                return await self._llamar(deadline, **kwargs)
+            finally:
+                self.en_vuelo -= 1
+
+    # Igual que create pero con stream=True: devuelve los eventos a medida que llegan.
+    # Solo se reintenta la apertura del stream; si se corta a la mitad el error sube tal cual.
+    async def stream(self, deadline_seconds: Optional[float] = None, **kwargs):
+        deadline = time.monotonic() + (deadline_seconds or self.deadline_seconds)
+        async with self._semaforo:
+            self.en_vuelo += 1
+            try:
+                stream = await self._llamar(deadline, stream=True, **kwargs)
+                async for event in stream:
+                    if time.monotonic() > deadline:
+                        await stream.close()
+                        raise LLMNoDisponible("Se agotó el tiempo para responder de OpenAI")
+                    yield event
+            finally:
+                self.en_vuelo -= 1
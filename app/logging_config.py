@@ -0,0 +1,193 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import re
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+
+# Logging estructurado (una línea JSON por evento) sin escribir a stdout desde el event loop:
+# los loggers encolan el registro (QueueHandler) y un thread aparte (QueueListener) lo formatea, redacta
+# y lo escribe. Si la cola se llena se descarta el registro en vez de bloquear el loop.
+#
+#   logger.info("trabajo creado", extra={"datos": {"job_id": job.id}})
+#   logger.info("feedback generado", extra={"datos": {...}, "payload": feedback})
+#
+# "datos" va siempre en la línea; "payload" es para contenido largo (el texto de GPT, un form entero):
+# solo se guarda en una fracción LOG_PAYLOAD_SAMPLE_RATE de los registros y recortado a LOG_PAYLOAD_MAX_CHARS.
+
+_request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Claves cuyo valor nunca se escribe, y patrones de secretos dentro de cualquier texto
+CLAVES_SECRETAS = re.compile(r"(api_?key|password|passwd|secret|token|authorization|cookie|database_url)", re.IGNORECASE)
+PATRONES_SECRETOS = [
+    (re.compile(r"sk-[A-Za-z0-9_\-]{8,}"), "sk-***"),
+    (re.compile(r"(Bearer\s+)[A-Za-z0-9._\-]+", re.IGNORECASE), r"\1***"),
+    (re.compile(r"(://[^:/@\s]+:)[^@\s]+(@)"), r"\1***\2"),
+]
+REDACTADO = "***"
+
+_ATRIBUTOS_NATIVOS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+
+def set_request_id(request_id: Optional[str]):
+    return _request_id.set(request_id)
+
+
+def reset_request_id(token) -> None:
+    _request_id.reset(token)
+
+
+def redactar(valor, clave: Optional[str] = None):
+    if clave is not None and CLAVES_SECRETAS.search(clave):
+        return REDACTADO if valor else valor
+    if isinstance(valor, str):
+        for patron, reemplazo in PATRONES_SECRETOS:
+            valor = patron.sub(reemplazo, valor)
+        return valor
+    if isinstance(valor, dict):
+        return {k: redactar(v, str(k)) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [redactar(v) for v in valor]
+    return valor
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        linea = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": redactar(record.getMessage()),
+        }
+        if getattr(record, "request_id", None):
+            linea["request_id"] = record.request_id
+        # Cualquier otro campo de extra={...} (datos, payload, etc.) va como clave propia
+        for clave, valor in vars(record).items():
+            if clave not in _ATRIBUTOS_NATIVOS and valor is not None:
+                linea[clave] = redactar(valor, clave)
+        if record.exc_text:
+            linea["exc"] = redactar(record.exc_text)
+        return json.dumps(linea, ensure_ascii=False, default=str)
+
+
+# Corre en el thread que loguea (antes de encolar): agrega el request_id y decide el muestreo del payload
+class ContextoFilter(logging.Filter):
+    def __init__(self, payload_sample_rate: float, payload_max_chars: int):
+        super().__init__()
+        self.payload_sample_rate = payload_sample_rate
+        self.payload_max_chars = payload_max_chars
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        payload = getattr(record, "payload", None)
+        if payload is not None:
+            if random.random() >= self.payload_sample_rate:
+                record.payload = None
+            else:
+                payload = payload if isinstance(payload, str) else json.dumps(payload, ensure_ascii=False, default=str)
+                record.payload = payload[:self.payload_max_chars]
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, cola: queue.Queue):
+        super().__init__(cola)
+        self.descartados = 0
+
+    # A diferencia del QueueHandler estándar no formatea acá: solo resuelve el mensaje y el traceback
+    # (que no se pueden pasar a otro thread); el JSON y la redacción los hace el thread escritor
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        mensaje = record.getMessage()
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            exc_text = logging.Formatter().formatException(record.exc_info)
+        record = logging.makeLogRecord(vars(record))
+        record.msg, record.args, record.exc_info, record.exc_text = mensaje, None, None, exc_text
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.descartados += 1
+
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_queue_handler: Optional[NonBlockingQueueHandler] = None
+
+
+# Reemplaza los handlers del logger raíz por el QueueHandler y arranca el thread escritor. Los loggers de
+# uvicorn (que al arrancar con `uvicorn main:app` ya tienen sus StreamHandlers) pasan a propagar al raíz.
+# Se puede llamar más de una vez (la segunda no hace nada).
+def configurar_logging(nivel: str = "INFO", payload_sample_rate: float = 0.01, payload_max_chars: int = 2000,
+                       queue_size: int = 10000, stream=None) -> NonBlockingQueueHandler:
+    global _listener, _queue_handler
+    if _queue_handler is not None:
+        return _queue_handler
+
+    cola = queue.Queue(maxsize=queue_size)
+    salida = logging.StreamHandler(stream or sys.stdout)
+    salida.setFormatter(JsonFormatter())
+    _listener = logging.handlers.QueueListener(cola, salida)
+
+    _queue_handler = NonBlockingQueueHandler(cola)
+    _queue_handler.addFilter(ContextoFilter(payload_sample_rate, payload_max_chars))
+
+    raiz = logging.getLogger()
+    for handler in list(raiz.handlers):
+        raiz.removeHandler(handler)
+    raiz.addHandler(_queue_handler)
+    raiz.setLevel(nivel.upper())
+    for nombre in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        logging.getLogger(nombre).handlers.clear()
+        logging.getLogger(nombre).propagate = True
+
+    _listener.start()
+    atexit.register(detener_logging)
+    return _queue_handler
+
+
+# Vacía la cola y frena el thread escritor (al apagar la app)
+def detener_logging() -> None:
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+# Toma el X-Request-ID del cliente (o genera uno), lo deja en el ContextVar para los logs del request
+# y lo devuelve en la respuesta
+class RequestIdMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for nombre, valor in scope["headers"]:
+            if nombre == b"x-request-id":
+                valor = valor.decode("latin-1")
+                if 0 < len(valor) <= 128 and valor.isprintable():
+                    request_id = valor
+                break
+        request_id = request_id or uuid.uuid4().hex
+        token = _request_id.set(request_id)
+
+        async def send_con_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", request_id.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_con_id)
+        finally:
+            _request_id.reset(token)
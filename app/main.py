@@ -1,26 +1,66 @@
 from datetime import datetime
+import logging
 import os
 from pydoc import text
 from typing import List, Optional
 import uvicorn
-import PyPDF2
-import docx2txt
 import re
-from fastapi import FastAPI, UploadFile, File, Form, Depends, BackgroundTasks, HTTPException, Request
+from fastapi import FastAPI, UploadFile, File, Form, Depends, BackgroundTasks, HTTPException, Request, Response, Query
 from fastapi.middleware.cors import CORSMiddleware
-from sentence_transformers import SentenceTransformer, util
+from fastapi.responses import StreamingResponse, JSONResponse
+from contextlib import asynccontextmanager
+from encoder import cargar_encoder, encoder_id
 from openai import OpenAI
 from dotenv import load_dotenv
-from sqlalchemy.orm import Session
-from database import Analize, Function, Profile, SessionLocal, Client, Job, Skill, Contact, Candidate, Nivel, Usage
+from sqlalchemy import Float, cast, select, func, tuple_, update
+from sqlalchemy.orm import Session, defer
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import AnalysisTask, Analize, Function, Profile, SessionLocal, AsyncSessionLocal, engine, async_engine, Client, Job, JobEmbedding, Skill, Contact, Candidate, Nivel, Usage
 import smtplib
 from email.message import EmailMessage
 from pydantic import BaseModel, EmailStr, field_validator
 import bleach
 from openai import AsyncOpenAI
 import asyncio
+import anyio
+import base64
+import hashlib
+import json
+import numpy as np
 from concurrent.futures import ThreadPoolExecutor
-from config import ORIGINS, OPENAI_API_KEY, OPENAI_BASE_URL
+from config import (
+    ORIGINS, OPENAI_API_KEY, OPENAI_BASE_URL,
+    BATCH_FEEDBACK_CONCURRENCY, BATCH_MAX_FILES,
+    TEXT_CACHE_MAX_ITEMS, TEXT_CACHE_DIR,
+    EXTRACTION_WORKERS, EXTRACTION_MAX_CONCURRENCY, EXTRACTION_TIMEOUT_SECONDS,
+    MAX_UPLOAD_BYTES, MAX_BATCH_UPLOAD_BYTES,
+    LLM_CACHE_MAX_ITEMS, LLM_CACHE_TTL_SECONDS, FEEDBACK_CANDIDATE_CACHE_HIT_COUNTS_USAGE,
+    VECTOR_INDEX_DIR, VECTOR_INDEX_DTYPE,
+    SCORING_MODE, CHUNK_WORDS, CHUNK_OVERLAP_WORDS, CHUNK_MAX_WINDOWS, CHUNK_POOLING, ENCODE_BATCH_SIZE,
+    ENCODER_BACKEND, ENCODER_ONNX_FILE, ENCODER_EXPORT_DIR, MODEL_READY_TIMEOUT_SECONDS,
+    EMBED_BATCH_MAX_SIZE, EMBED_BATCH_MAX_WAIT_MS,
+    ANALYSIS_TASK_WORKERS, ANALYSIS_TASK_POLL_SECONDS, ANALYSIS_TASK_LEASE_SECONDS, ANALYSIS_TASK_MAX_ATTEMPTS,
+    IMPORT_MAX_ROWS,
+    LLM_MAX_CONCURRENCY, LLM_REQUESTS_PER_MINUTE, LLM_TOKENS_PER_MINUTE, LLM_MAX_RETRIES,
+    LLM_BACKOFF_BASE_SECONDS, LLM_BACKOFF_MAX_SECONDS, LLM_DEADLINE_SECONDS,
+    SERVER_TIMING_ENABLED, SERVER_TIMING_DEBUG,
+    LOG_LEVEL, LOG_PAYLOAD_SAMPLE_RATE, LOG_PAYLOAD_MAX_CHARS, LOG_QUEUE_SIZE,
+)
+from text_cache import TextCache
+from extraction import ArchivoIlegible, ExtractionPool, ExtractionTimeout
+from uploads import LimitUploadSizeMiddleware, validar_archivo_cv
+from llm_cache import ResponseCache
+from vector_index import VectorIndex
+from scoring import dividir_cvs_en_ventanas, puntuar_ventanas, similitud_coseno
+from embedding_service import EmbeddingBatcher
+from task_queue import TareaFallida, TaskWorkerPool, actualizar_etapa
+from job_import import ImportacionInvalida, importar_trabajos, leer_filas
+from llm_gateway import LLMGateway, LLMNoDisponible, LLMRespuestaIncompleta
+from metrics import MetricsMiddleware, etapa, exportar, medir, registrar_gauges
+from profiling import ServerTimingMiddleware, instrumentar_engine, medir_tiempo, perfilado
+from logging_config import RequestIdMiddleware, configurar_logging, detener_logging
 
 # acá pongo la clase de  AnalizeSchema.
 class AnalizeSchema(BaseModel):
@@ -28,7 +68,7 @@ class AnalizeSchema(BaseModel):
     name: str
     job_title: str
     match_score: float
-    feedback: str    
+    feedback: Optional[str]
     decision: str
     file_name: str
     created_at: datetime
@@ -37,21 +77,53 @@ class AnalizeSchema(BaseModel):
 
 # segun lo que lei y con chatgpt hacemos un executor para manejar las tareas asincronas globales.
 executor = ThreadPoolExecutor()
-from auth import is_signed_in, request_state_payload
+from auth import AuthState, authenticate, request_state_payload
 
 
 # Cargar variables de entorno
 load_dotenv(override=True)
 
+# Logs en JSON por un thread aparte (ver logging_config.py): nada de print en el event loop
+configurar_logging(LOG_LEVEL, LOG_PAYLOAD_SAMPLE_RATE, LOG_PAYLOAD_MAX_CHARS, LOG_QUEUE_SIZE)
+logger = logging.getLogger(__name__)
+
 # Verificar que la API Key de OpenAI está configurada
 if not OPENAI_API_KEY:
     raise ValueError("ERROR: La API Key de OpenAI no se encontró.")
 
-async_client = AsyncOpenAI(base_url = OPENAI_BASE_URL, api_key=OPENAI_API_KEY)
-
-print("API Key cargada en el backend:", OPENAI_API_KEY)
+# Los reintentos los hace llm_gateway (con backoff y deadline), no el cliente de OpenAI
+async_client = AsyncOpenAI(base_url = OPENAI_BASE_URL, api_key=OPENAI_API_KEY, max_retries=0)
+llm_gateway = LLMGateway(
+    async_client,
+    max_concurrency=LLM_MAX_CONCURRENCY,
+    requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+    tokens_per_minute=LLM_TOKENS_PER_MINUTE,
+    max_retries=LLM_MAX_RETRIES,
+    backoff_base=LLM_BACKOFF_BASE_SECONDS,
+    backoff_max=LLM_BACKOFF_MAX_SECONDS,
+    deadline_seconds=LLM_DEADLINE_SECONDS,
+)
 
-app = FastAPI()
+# Nunca se loguea la API key; la URL de la base va sin la contraseña
+logger.info("Backend iniciado", extra={"datos": {
+    "openai_base_url": OPENAI_BASE_URL,
+    "base_de_datos": engine.url.render_as_string(hide_password=True),
+}})
+
+# Al arrancar no se carga el modelo: se lanza en segundo plano (carga + warm-up) para que uvicorn
+# empiece a atender enseguida. Los endpoints livianos funcionan desde el primer momento y /ready
+# recién responde 200 cuando el modelo ya está calentado.
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    carga = asyncio.create_task(cargar_modelo())
+    yield
+    carga.cancel()
+    tareas_pool.close()
+    embedding_service.close()
+    extraction_pool.shutdown()
+    detener_logging()
+
+app = FastAPI(lifespan=lifespan)
 
 # Conexion con la base de datos.
 def get_db():
@@ -61,9 +133,16 @@ def get_db():
     finally: 
         db.close()
 
+# Conexion asíncrona, para los endpoints que hablan con la base de datos en el camino caliente
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 
-async def check_signed_in(request: Request):
-    if not is_signed_in(request):
+# authenticate verifica el token una sola vez por request (FastAPI cachea la dependency y además
+# queda guardado en request.state.auth), así request_state_payload no lo vuelve a verificar.
+async def check_signed_in(auth: AuthState = Depends(authenticate)):
+    if not auth.is_signed_in:
         raise HTTPException(status_code=404, detail="Usuario no encontrado")
 
 app.add_middleware(
@@ -72,10 +151,98 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  
     allow_headers=["*"], 
+    expose_headers=["Server-Timing", "X-Next-Cursor", "X-Request-ID"],
 )
 
-# Modelo NLP para similitud semántica.
-model = SentenceTransformer("all-MiniLM-L6-v2")
+# Límite de bytes del body en las rutas que reciben CV (el margen es para los demás campos del form)
+MARGEN_FORM_BYTES = 64 * 1024
+app.add_middleware(
+    LimitUploadSizeMiddleware,
+    limits={
+        "/analyze/": MAX_UPLOAD_BYTES + MARGEN_FORM_BYTES,
+        "/analyze/stream/": MAX_UPLOAD_BYTES + MARGEN_FORM_BYTES,
+        "/feedbackCandidate/": MAX_UPLOAD_BYTES + MARGEN_FORM_BYTES,
+        "/feedbackCandidate/stream/": MAX_UPLOAD_BYTES + MARGEN_FORM_BYTES,
+        "/analyze/batch/": MAX_BATCH_UPLOAD_BYTES,
+        "/analyze/tareas/": MAX_UPLOAD_BYTES + MARGEN_FORM_BYTES,
+        "/trabajos/importar/": MAX_UPLOAD_BYTES + MARGEN_FORM_BYTES,
+    },
+)
+
+# Server-Timing por request (ver profiling.py). Desactivado no se agrega el middleware ni los hooks de SQL.
+if SERVER_TIMING_ENABLED:
+    app.add_middleware(ServerTimingMiddleware, debug=SERVER_TIMING_DEBUG)
+    instrumentar_engine(engine)
+    instrumentar_engine(async_engine.sync_engine)
+
+# Por fuera de CORS, del límite de upload y de Server-Timing (solo RequestIdMiddleware queda más afuera)
+# para medir también los 413 y las respuestas de CORS
+app.add_middleware(MetricsMiddleware)
+
+# El más externo: el request_id queda disponible para los logs de todos los demás middlewares
+app.add_middleware(RequestIdMiddleware)
+
+# Modelo NLP para similitud semántica. El backend (torch, onnx u onnx-int8) se elige con ENCODER_BACKEND;
+# ENCODER_ID es lo que se guarda junto a los embeddings para no mezclar vectores de backends distintos.
+# model se asigna en cargar_modelo (lifespan), no al importar main.py.
+MODEL_NAME = "all-MiniLM-L6-v2"
+ENCODER_ID = encoder_id(MODEL_NAME, ENCODER_BACKEND)
+model = None
+model_ready = asyncio.Event()
+
+# Embeddings de los trabajos en memoria: job_id -> (texto_hash, embedding de las funciones).
+# Se llena al arrancar con lo guardado en embeddings_de_trabajo y se actualiza al crear trabajos.
+job_embeddings = {}
+
+# Índice con los embeddings de los CV ya analizados, para buscar candidatos pasados parecidos a un trabajo
+vector_index = None
+
+def cargar_embeddings_de_trabajos():
+    db = SessionLocal()
+    try:
+        for row in db.query(JobEmbedding).filter(JobEmbedding.model_name == ENCODER_ID).all():
+            job_embeddings[row.job_id] = (row.texto_hash, np.frombuffer(row.funciones_embedding, dtype=np.float32))
+    finally:
+        db.close()
+
+# Carga el encoder, hace un encode de prueba (así el primer /analyze/ no paga la inicialización
+# de los kernels) y deja listos el índice de vectores y los embeddings de los trabajos.
+def cargar_modelo_sync():
+    global model, vector_index
+    encoder = cargar_encoder(MODEL_NAME, ENCODER_BACKEND, ENCODER_ONNX_FILE, ENCODER_EXPORT_DIR)
+    encoder.encode(["calentando el modelo", "desarrollador python con experiencia en apis " * 40], batch_size=ENCODE_BATCH_SIZE, convert_to_numpy=True)
+    if VECTOR_INDEX_DIR:
+        vector_index = VectorIndex(VECTOR_INDEX_DIR, encoder.get_sentence_embedding_dimension(), VECTOR_INDEX_DTYPE, encoder=ENCODER_ID)
+    cargar_embeddings_de_trabajos()
+    model = encoder
+
+def codificar_textos_sync(textos: List[str]) -> np.ndarray:
+    return model.encode(textos, batch_size=ENCODE_BATCH_SIZE, convert_to_numpy=True)
+
+# Todos los encode de los endpoints async pasan por acá: los CV (o sus ventanas) y los trabajos
+# de requests concurrentes se codifican juntos en un mismo lote.
+embedding_service = EmbeddingBatcher(codificar_textos_sync, EMBED_BATCH_MAX_SIZE, EMBED_BATCH_MAX_WAIT_MS, executor)
+
+registrar_gauges(executor, {"sync": engine, "async": async_engine.sync_engine}, llm_gateway, embedding_service)
+
+async def cargar_modelo():
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(executor, cargar_modelo_sync)
+    except Exception as e:
+        logger.exception("Error al cargar el modelo")
+        raise
+    model_ready.set()
+    # Los workers de la cola de análisis arrancan recién con el modelo cargado
+    tareas_pool.start()
+
+# Dependency para los endpoints que usan el modelo: espera a que termine de cargar
+# (hasta MODEL_READY_TIMEOUT_SECONDS) y si no, responde 503 para que el cliente reintente.
+async def require_model():
+    try:
+        await asyncio.wait_for(model_ready.wait(), timeout=MODEL_READY_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        raise HTTPException(status_code=503, detail="El modelo se está cargando, intentá de nuevo en unos segundos.", headers={"Retry-After": "5"})
 
 # ==========================================================
 # VALIDACIÓN Y SANITIZACIÓN DEL FORMULARIO DE CONTACTO
@@ -122,38 +289,36 @@ def as_contact_form(
 # ENDPOINTS para **añadir trabajos y habilidades**
 # ==========================================================
 
-@app.post("/agregar_trabajo/", dependencies=[Depends(check_signed_in)])
+@app.post("/agregar_trabajo/", dependencies=[Depends(check_signed_in), Depends(require_model)])
 async def agregar_trabajo(
     nombre_del_cliente: str = Form(...),
     titulo_de_trabajo: str = Form(...),
     perfil_del_trabajador: str = Form(...),  
     funciones_del_trabajo: str = Form(...),
     habilidades: str = Form(...),  
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     
-    print("📩 Recibiendo solicitud con los siguientes datos:")
-    print(f"Cliente: {nombre_del_cliente}")
-    print(f"Trabajo: {titulo_de_trabajo}")
-    print(f"Perfil: {perfil_del_trabajador}")
-    print(f"Funciones: {funciones_del_trabajo}")
-    print(f"Habilidades: {habilidades}")
+    logger.info("Agregando trabajo", extra={
+        "datos": {"cliente": nombre_del_cliente, "trabajo": titulo_de_trabajo},
+        "payload": {"perfil": perfil_del_trabajador, "funciones": funciones_del_trabajo, "habilidades": habilidades},
+    })
     
     #Buscar si el cliente ya existe
-    client = db.query(Client).filter(Client.name == nombre_del_cliente).first()
+    client = (await db.scalars(select(Client).where(Client.name == nombre_del_cliente))).first()
     if not client:
         client = Client(name=nombre_del_cliente)
         db.add(client)
-        db.flush()
-        db.commit()
-        db.refresh(client)
+        await db.flush()
+        await db.commit()
+        await db.refresh(client)
 
     #Crear un nuevo trabajo
     job = Job(title=titulo_de_trabajo, client_id=client.id)
     db.add(job)
-    db.flush()
-    db.commit()
-    db.refresh(job)
+    await db.flush()
+    await db.commit()
+    await db.refresh(job)
 
     # Guardar habilidades en la base de datos
     for skill in habilidades.split(","):
@@ -166,24 +331,67 @@ async def agregar_trabajo(
     for function in funciones_del_trabajo.split(","):
         db.add(Function(title=function.strip(), job_id=job.id))
         
-    db.flush()
-    db.commit()
+    await db.flush()
+    await db.commit()
+
+    # Calculamos una sola vez el embedding de las funciones y el perfil, así /analyze/ solo codifica el CV
+    funciones = ", ".join(function.strip() for function in funciones_del_trabajo.split(","))
+    await obtener_embedding_del_trabajo(db, job.id, funciones, perfil_del_trabajador.strip())
     return {"message": "Trabajo, habilidades, perfil y funciones registradas exitosamente"}
 
+# Importación masiva del catálogo: un CSV o JSON con los mismos campos que /agregar_trabajo/.
+# Todo entra en una sola transacción; las filas con errores se saltean y se devuelven en "errores".
+# Los embeddings de los trabajos nuevos se calculan la primera vez que se analiza un CV contra ellos.
+@app.post("/trabajos/importar/", dependencies=[Depends(check_signed_in)])
+async def importar_catalogo_de_trabajos(
+    file: UploadFile = File(...),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(status_code=413, detail="El archivo es demasiado grande.")
+    try:
+        filas = leer_filas(await file.read(), file.filename or "")
+    except ImportacionInvalida as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if len(filas) > IMPORT_MAX_ROWS:
+        raise HTTPException(status_code=400, detail=f"Se pueden importar hasta {IMPORT_MAX_ROWS} trabajos por archivo.")
+
+    return await importar_trabajos(db, filas)
+
 
 # ==========================================================
 # Funciones para analizar el CV y generar feedback
 # ==========================================================
 
-# Función para extraer texto de un archivo PDF o DOCX
-def extract_text(file: UploadFile) -> str:
-    text = ""
-    if file.filename.endswith(".pdf"):
-        pdf_reader = PyPDF2.PdfReader(file.file)
-        text = " ".join(page.extract_text() for page in pdf_reader.pages if page.extract_text())
-    elif file.filename.endswith(".docx"):
-        text = docx2txt.process(file.file)
-    return text.lower()  # Convertir todo a minúsculas para evitar errores de coincidencia
+# Cache del texto extraído, así si suben el mismo CV otra vez no se vuelve a parsear
+text_cache = TextCache(max_items=TEXT_CACHE_MAX_ITEMS, directory=TEXT_CACHE_DIR)
+
+# Pool de procesos para parsear los CV sin bloquear el event loop (se cierra en el lifespan)
+extraction_pool = ExtractionPool(EXTRACTION_WORKERS, EXTRACTION_MAX_CONCURRENCY, EXTRACTION_TIMEOUT_SECONDS, fallback_executor=executor)
+
+# Extrae el texto de un PDF o DOCX: el parseo corre en el pool de procesos, con timeout por documento.
+# La extensión va en la clave del cache porque el mismo contenido se parsea distinto según el tipo.
+@perfilado("extract_text")
+async def extract_text_async(file: UploadFile) -> str:
+    # Tamaño y magic bytes se revisan antes de leer el archivo completo
+    extension = validar_archivo_cv(file, MAX_UPLOAD_BYTES)
+    data = await file.read()
+    return await extraer_texto_de_bytes_async(data, file.filename, extension)
+
+async def extraer_texto_de_bytes_async(data: bytes, filename: str, extension: str) -> str:
+    key = TextCache.key_for(data) + extension
+    cached = text_cache.get(key)
+    if cached is not None:
+        return cached
+
+    try:
+        text = await extraction_pool.extract(data, filename)
+    except ExtractionTimeout:
+        raise HTTPException(status_code=422, detail="El archivo tardó demasiado en procesarse.")
+    except ArchivoIlegible:
+        raise HTTPException(status_code=422, detail="No se pudo leer el archivo: está dañado o no es un PDF/DOCX válido.")
+    text_cache.set(key, text)
+    return text
 
 # Función para extraer experiencia en años usando expresiones regulares
 def extract_experience(text: str) -> list:
@@ -192,18 +400,181 @@ def extract_experience(text: str) -> list:
 
 # Función para calcular la similitud semántica entre el CV y la descripción del trabajo y el ThreadPoolExecutor
 def match_resume_to_job_sync(resume_text: str, funciones_del_trabajo: str) -> float:
-    embeddings = model.encode([resume_text, funciones_del_trabajo], convert_to_tensor=True)
-    score = util.pytorch_cos_sim(embeddings[0], embeddings[1]).item()
+    if SCORING_MODE == "chunked":
+        job_embedding = model.encode(funciones_del_trabajo, convert_to_numpy=True)
+        return match_resume_to_job_embedding_sync(resume_text, job_embedding)[0]
+    embeddings = model.encode([resume_text, funciones_del_trabajo], convert_to_numpy=True)
+    score = similitud_coseno(embeddings[0], embeddings[1]).item()
     return round(score, 2)
 
-async def match_resume_to_job_async(resume_text: str, funciones_del_trabajo: str) -> float:
+# Textos del trabajo que se comparan contra el CV: funciones y perfil del trabajador
+async def textos_del_trabajo(db: AsyncSession, job: Job) -> tuple:
+    funciones = (await db.scalars(select(Function.title).where(Function.job_id == job.id).order_by(Function.id))).all()
+    perfiles = (await db.scalars(select(Profile.name).where(Profile.job_id == job.id).order_by(Profile.id))).all()
+    funciones_del_trabajo = ", ".join(funciones) if funciones else "No especificado"
+    perfil_del_trabajador = ", ".join(perfiles)
+    return funciones_del_trabajo, perfil_del_trabajador
+
+def hash_texto(*textos: str) -> str:
+    return hashlib.sha256("\n".join(textos).encode("utf-8")).hexdigest()
+
+# Devuelve el embedding de las funciones del trabajo: primero de memoria, después de la base de datos
+# y si las funciones o el perfil cambiaron (o no existe) lo calcula y lo guarda.
+# Se guarda con INSERT ... ON CONFLICT (job_id) DO UPDATE: varios análisis del mismo trabajo sin embedding
+# (ej. recién importado) lo calculan a la vez y todos escriben la misma fila sin chocar con el unique.
+async def obtener_embedding_del_trabajo(db: AsyncSession, job_id: int, funciones_del_trabajo: str, perfil_del_trabajador: str) -> np.ndarray:
+    texto_hash = hash_texto(ENCODER_ID, funciones_del_trabajo, perfil_del_trabajador)
+    cached = job_embeddings.get(job_id)
+    if cached and cached[0] == texto_hash:
+        return cached[1]
+
+    row = (await db.scalars(select(JobEmbedding).where(JobEmbedding.job_id == job_id))).one_or_none()
+    if row and row.texto_hash == texto_hash and row.model_name == ENCODER_ID:
+        embedding = np.frombuffer(row.funciones_embedding, dtype=np.float32)
+    else:
+        embeddings = await embedding_service.encode([funciones_del_trabajo, perfil_del_trabajador])
+        embedding, perfil_embedding = embeddings[0].astype(np.float32), embeddings[1].astype(np.float32)
+        valores = {
+            "model_name": ENCODER_ID,
+            "texto_hash": texto_hash,
+            "funciones_embedding": embedding.tobytes(),
+            "perfil_embedding": perfil_embedding.tobytes(),
+            "updated_at": datetime.utcnow(),
+        }
+        insert_dialecto = pg_insert if db.bind.dialect.name == "postgresql" else sqlite_insert
+        await db.execute(
+            insert_dialecto(JobEmbedding).values(job_id=job_id, **valores)
+            .on_conflict_do_update(index_elements=["job_id"], set_=valores)
+        )
+        await db.commit()
+
+    job_embeddings[job_id] = (texto_hash, embedding)
+    return embedding
+
+# Similitud contra el embedding ya calculado del trabajo: solo se codifica el CV.
+# Devuelve (match_score, embedding del CV) para poder guardarlo en el índice de vectores.
+def match_resume_to_job_embedding_sync(resume_text: str, job_embedding: np.ndarray) -> tuple:
+    scores, embeddings = match_resumes_to_job_batch_sync([resume_text], job_embedding)
+    return scores[0], embeddings[0]
+
+async def match_resume_to_job_embedding_async(db: AsyncSession, job_id: int, resume_text: str, funciones_del_trabajo: str, perfil_del_trabajador: str) -> tuple:
+    scores, embeddings = await match_resumes_to_job_batch_async(db, job_id, [resume_text], funciones_del_trabajo, perfil_del_trabajador)
+    return scores[0], embeddings[0]
+
+# Igual que match_resume_to_job_embedding_sync pero para varios CV: un solo model.encode con todos los textos
+# y la similitud se calcula de una vez como matriz contra el embedding del trabajo.
+# Devuelve (match_scores, embeddings de los CV).
+# En modo "chunked" todas las ventanas de todos los CV van en el mismo encode.
+def match_resumes_to_job_batch_sync(resume_texts: List[str], job_embedding: np.ndarray) -> tuple:
+    textos, offsets = textos_a_codificar(resume_texts)
+    return puntuar_cvs(codificar_textos_sync(textos), offsets, job_embedding)
+
+# Los textos que hay que codificar para puntuar los CV: los CV enteros, o en modo "chunked" sus ventanas
+# (offsets dice dónde empiezan las ventanas de cada CV)
+def textos_a_codificar(resume_texts: List[str]) -> tuple:
+    if SCORING_MODE == "chunked":
+        return dividir_cvs_en_ventanas(resume_texts, CHUNK_WORDS, CHUNK_OVERLAP_WORDS, CHUNK_MAX_WINDOWS)
+    return resume_texts, None
+
+def puntuar_cvs(embeddings: np.ndarray, offsets, job_embedding: np.ndarray) -> tuple:
+    if offsets is not None:
+        scores, embeddings = puntuar_ventanas(embeddings, offsets, job_embedding, CHUNK_POOLING)
+        return [round(float(score), 2) for score in scores], embeddings
+
+    scores = similitud_coseno(embeddings, job_embedding).squeeze(1)
+    return [round(score, 2) for score in scores.tolist()], embeddings
+
+@perfilado("match")
+async def match_resumes_to_job_batch_async(db: AsyncSession, job_id: int, resume_texts: List[str], funciones_del_trabajo: str, perfil_del_trabajador: str) -> tuple:
+    job_embedding = await obtener_embedding_del_trabajo(db, job_id, funciones_del_trabajo, perfil_del_trabajador)
+    textos, offsets = textos_a_codificar(resume_texts)
+    embeddings = await embedding_service.encode(textos)
+    return puntuar_cvs(embeddings, offsets, job_embedding)
+
+# Agrega los embeddings de CV recién analizados al índice de vectores (escribe a disco, por eso va al executor)
+async def indexar_cvs(analisis_ids: List[int], embeddings) -> None:
+    if vector_index is None:
+        return
     loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(executor, match_resume_to_job_sync, resume_text, funciones_del_trabajo)
+    try:
+        await loop.run_in_executor(executor, vector_index.append, analisis_ids, np.asarray(embeddings))
+    except Exception as e:
+        # Si falla el índice el análisis igual quedó guardado
+        logger.warning("Error al agregar al índice de vectores: %s", e, extra={"datos": {"analisis_ids": analisis_ids}})
 
-# Generar un feedback detallado usando GPT-4o-mini
-async def generate_gpt_feedback_async(resume_text: str = Form(...), nombre_del_cliente: str = (Form(...)), funciones_del_trabajo: str = Form(...), perfil_del_trabajador: str = Form(...)) -> str:
+# Decisión según el match_score
+def calcular_decision(match_score: float) -> str:
+    if match_score >= 0.6:
+        return "Puntaje Alto"
+    elif match_score >= 0.5:
+        return "Puntaje Promedio"
+    return "Puntaje Bajo"
+
+# Cache de respuestas de GPT, compartido por /analyze/ y /feedbackCandidate/
+llm_cache = ResponseCache(max_items=LLM_CACHE_MAX_ITEMS, ttl_seconds=LLM_CACHE_TTL_SECONDS)
+
+# Llama a OpenAI, o devuelve la respuesta guardada si ya se mandó exactamente el mismo prompt.
+# Devuelve (texto, desde_cache).
+async def generar_respuesta_llm(system_prompt: str, user_prompt: str, modelo: str = "gpt-4o-mini") -> tuple:
+    key = ResponseCache.key_for(modelo, system_prompt, user_prompt)
+    cached = llm_cache.get(key)
+    if cached is not None:
+        return cached, True
+
+    response = await llm_gateway.create(
+        model=modelo,
+        input=[{"role": "system", "content": system_prompt},
+                  {"role": "user", "content": user_prompt}]
+    )
+    llm_cache.set(key, response.output_text)
+    return response.output_text, False
+
+# Igual que generar_respuesta_llm pero con la Responses API en modo stream: va devolviendo los
+# fragmentos de texto a medida que llegan. En un hit del cache se devuelve el texto completo de una vez.
+async def generar_respuesta_llm_stream(system_prompt: str, user_prompt: str, modelo: str = "gpt-4o-mini"):
+    key = ResponseCache.key_for(modelo, system_prompt, user_prompt)
+    cached = llm_cache.get(key)
+    if cached is not None:
+        yield cached
+        return
 
-    prompt = f"""
+    partes = []
+    completado = False
+    stream = llm_gateway.stream(
+        model=modelo,
+        input=[{"role": "system", "content": system_prompt},
+                  {"role": "user", "content": user_prompt}],
+    )
+    async for event in stream:
+        if event.type == "response.output_text.delta":
+            partes.append(event.delta)
+            yield event.delta
+        elif event.type == "response.completed":
+            completado = True
+        elif event.type == "response.failed":
+            error = getattr(event.response, "error", None)
+            raise LLMRespuestaIncompleta(f"OpenAI no pudo generar la respuesta: {getattr(error, 'message', None) or 'error desconocido'}")
+        elif event.type == "response.incomplete":
+            detalle = getattr(event.response, "incomplete_details", None)
+            raise LLMRespuestaIncompleta(f"OpenAI cortó la respuesta: {getattr(detalle, 'reason', None) or 'motivo desconocido'}")
+    # Sin response.completed el texto puede estar truncado: no se guarda en el cache (y el que llama no lo persiste)
+    if not completado:
+        raise LLMRespuestaIncompleta("El stream de OpenAI terminó sin completar la respuesta")
+    llm_cache.set(key, "".join(partes))
+
+# 503 con Retry-After cuando OpenAI no respondió a tiempo (límite de uso, caída o deadline agotado)
+def llm_no_disponible(e: LLMNoDisponible) -> HTTPException:
+    retry_after = max(1, round(e.retry_after)) if e.retry_after else 5
+    return HTTPException(status_code=503, detail=f"Error al comunicarse con OpenAI: {e}", headers={"Retry-After": str(retry_after)})
+
+# Formato de un evento Server-Sent Events
+def evento_sse(evento: str, data) -> str:
+    return f"event: {evento}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+SYSTEM_PROMPT_ANALISIS = "Eres un experto en selección de talento humano."
+
+def construir_prompt_analisis(resume_text: str, nombre_del_cliente: str, funciones_del_trabajo: str, perfil_del_trabajador: str) -> str:
+    return f"""
     Un cliente llamado **{nombre_del_cliente}** está buscando contratar a un candidato para un puesto específico. 
     Este cliente tiene las siguientes políticas y requisitos de contratación:
 
@@ -237,13 +608,12 @@ async def generate_gpt_feedback_async(resume_text: str = Form(...), nombre_del_c
     - **Recomendación final:**
     """
 
-    response = await async_client.responses.create(
-        model="gpt-4o-mini",
-        input=[{"role": "system", "content": "Eres un experto en selección de talento humano."},
-                  {"role": "user", "content": prompt}]
-    )
-    
-    feedback_text = response.output_text
+# Generar un feedback detallado usando GPT-4o-mini
+@perfilado("gpt")
+async def generate_gpt_feedback_async(resume_text: str = Form(...), nombre_del_cliente: str = (Form(...)), funciones_del_trabajo: str = Form(...), perfil_del_trabajador: str = Form(...)) -> str:
+
+    prompt = construir_prompt_analisis(resume_text, nombre_del_cliente, funciones_del_trabajo, perfil_del_trabajador)
+    feedback_text, _ = await generar_respuesta_llm(SYSTEM_PROMPT_ANALISIS, prompt)
      
     return{"feedback": feedback_text}
 
@@ -255,7 +625,7 @@ def send_notification_email(contact: Contact):
     EMAIL_ADDRESS = os.getenv("EMAIL_ADDRESS")
     EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")
     if not EMAIL_ADDRESS or not EMAIL_PASSWORD:
-        print("No se configuró EMAIL_ADDRESS o EMAIL_PASSWORD asi que hazlo")
+        logger.warning("No se configuró EMAIL_ADDRESS o EMAIL_PASSWORD, no se envía la notificación")
         return
 
     msg = EmailMessage()
@@ -275,68 +645,69 @@ def send_notification_email(contact: Contact):
         with smtplib.SMTP_SSL("smtp.gmail.com", 465) as smtp:
             smtp.login(EMAIL_ADDRESS, EMAIL_PASSWORD)
             smtp.send_message(msg)
-        print("Email enviado correctamente.")
-    except Exception as e:
-        print(f"Error al enviar email: {e}")
+        logger.info("Email de notificación enviado", extra={"datos": {"contact_id": contact.id}})
+    except Exception:
+        logger.exception("Error al enviar email", extra={"datos": {"contact_id": contact.id}})
 
 
 # ==========================================================
 # Analizar un CV y obtener políticas del cliente
 # ==========================================================
 
-@app.post("/analyze/", dependencies=[Depends(check_signed_in)])
+@app.post("/analyze/", dependencies=[Depends(check_signed_in), Depends(require_model)])
 async def analyze_resume(
     file: UploadFile = File(...),
     job_id: int = Form(...),
     client_id: int = Form(...),
     nombre_del_candidato: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Obtener el cliente
-    client = db.query(Client).filter(Client.id == client_id).one_or_none()
+    client = await db.get(Client, client_id)
     if not client:
         return {"error": "Cliente no encontrado"}
 
     # Obtener el trabajo desde la base de datos
-    job = db.query(Job).filter(Job.id == job_id).one_or_none()
+    job = await db.get(Job, job_id)
     if not job:
         return {"error": "Trabajo no encontrado"}
 
-    funciones_del_trabajo = ", ".join([f.title for f in job.functions]) if job.functions else "No especificado"
-
-    # Obtener perfil del trabajador
-    perfil_del_trabajador = ", ".join([p.name for p in db.query(Profile).filter(Profile.job_id == job.id).all()])
+    # Obtener funciones y perfil del trabajador
+    funciones_del_trabajo, perfil_del_trabajador = await textos_del_trabajo(db, job)
 
     
     
     # Extraer texto del CV
-    resume_text = extract_text(file)
+    with etapa("analyze", "extraction"):
+        resume_text = await extract_text_async(file)
 
     # lanzo la tareas asíncrona con TaskGroup
     # para calcular match_score y generar el feedback de chatGPT
 
-    async with asyncio.TaskGroup() as tg:
-        task1 = tg.create_task(
-            generate_gpt_feedback_async(resume_text, client.name, funciones_del_trabajo, perfil_del_trabajador))
-        task2 = tg.create_task(
-            match_resume_to_job_async(resume_text, funciones_del_trabajo))
+    try:
+        async with asyncio.TaskGroup() as tg:
+            task1 = tg.create_task(medir("analyze", "llm",
+                generate_gpt_feedback_async(resume_text, client.name, funciones_del_trabajo, perfil_del_trabajador)))
+            task2 = tg.create_task(medir("analyze", "encode",
+                match_resume_to_job_embedding_async(db, job.id, resume_text, funciones_del_trabajo, perfil_del_trabajador)))
+    except* LLMNoDisponible as grupo:
+        raise llm_no_disponible(grupo.exceptions[0])
+    except* Exception as grupo:
+        # Cualquier otro error se relanza solo (sin el ExceptionGroup del TaskGroup) para que el 500 y el log
+        # muestren la causa real
+        raise grupo.exceptions[0]
 
     # asignar los resultados de las funciones
     feedback =  task1.result()
-    match_score = task2.result()
+    match_score, resume_embedding = task2.result()
 
     # Ajuste en la decisión basado en el match_score
-    if match_score >= 0.6:
-        
-        decision = "Puntaje Alto"
-        
-    elif match_score >= 0.5:
-        
-        decision = "Puntaje Promedio"
-    else:
-        decision = "Puntaje Bajo"
+    decision = calcular_decision(match_score)
 
-    print (feedback)
+    logger.info("CV analizado", extra={
+        "datos": {"job_id": job.id, "match_score": round(float(match_score), 4), "decision": decision},
+        "payload": feedback,
+    })
 # Guardar el análisis en la base de datos
     new_analysis = Analize(
         feedback=feedback["feedback"],
@@ -347,7 +718,9 @@ async def analyze_resume(
         name=nombre_del_candidato,
     )
     db.add(new_analysis)
-    db.commit()
+    with etapa("analyze", "db_commit"):
+        await db.commit()
+    await indexar_cvs([new_analysis.id], [resume_embedding])
 
     return {
         "id": new_analysis.id,
@@ -360,11 +733,406 @@ async def analyze_resume(
         "created_at": new_analysis.created_at
         }
 
+# ==========================================================
+# Análisis asíncronos: el cliente recibe un id enseguida (202) y consulta el estado
+# ==========================================================
+
+# Progreso aproximado de cada etapa, para la barra de progreso del frontend
+PROGRESO_POR_ETAPA = {
+    "en_cola": 0,
+    "extrayendo_texto": 10,
+    "analizando": 30,
+    "guardando": 90,
+    "completado": 100,
+}
+
+@app.post("/analyze/tareas/", status_code=202, dependencies=[Depends(check_signed_in)])
+async def crear_tarea_de_analisis(
+    request: Request,
+    file: UploadFile = File(...),
+    job_id: int = Form(...),
+    client_id: int = Form(...),
+    nombre_del_candidato: str = Form(...),
+    db: AsyncSession = Depends(get_async_db)
+):
+    validar_archivo_cv(file, MAX_UPLOAD_BYTES)
+    if not await db.get(Client, client_id):
+        raise HTTPException(status_code=404, detail="Cliente no encontrado")
+    if not await db.get(Job, job_id):
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+
+    tarea = AnalysisTask(
+        client_id=client_id,
+        job_id=job_id,
+        nombre_del_candidato=nombre_del_candidato,
+        file_name=file.filename,
+        file_data=await file.read(),
+    )
+    db.add(tarea)
+    await db.commit()
+    tareas_pool.notify()
+
+    status_url = str(request.url_for("estado_tarea_de_analisis", task_id=tarea.id))
+    return JSONResponse(
+        status_code=202,
+        content={"task_id": tarea.id, "estado": tarea.estado, "status_url": status_url},
+        headers={"Location": status_url},
+    )
+
+@app.get("/analyze/tareas/{task_id}", dependencies=[Depends(check_signed_in)])
+async def estado_tarea_de_analisis(task_id: int, db: AsyncSession = Depends(get_async_db)):
+    # file_data no se carga: el CV puede pesar varios MB y acá no se usa
+    tarea = await db.get(AnalysisTask, task_id, options=[defer(AnalysisTask.file_data)])
+    if not tarea:
+        raise HTTPException(status_code=404, detail="Tarea no encontrada")
+
+    resultado = None
+    if tarea.estado == "completado" and tarea.analisis_id is not None:
+        analisis = await db.get(Analize, tarea.analisis_id)
+        if analisis:
+            resultado = {
+                "id": analisis.id,
+                "file_name": analisis.file_name,
+                "job_title": analisis.job_title,
+                "match_score": analisis.match_score,
+                "name": analisis.name,
+                "decision": analisis.decision,
+                "feedback": {"feedback": analisis.feedback},
+                "created_at": analisis.created_at,
+            }
+    return {
+        "task_id": tarea.id,
+        "estado": tarea.estado,
+        "etapa": tarea.etapa,
+        "progreso": PROGRESO_POR_ETAPA.get(tarea.etapa, 0),
+        "intentos": tarea.intentos,
+        "error": tarea.error if tarea.estado == "error" else None,
+        "created_at": tarea.created_at,
+        "updated_at": tarea.updated_at,
+        "resultado": resultado,
+    }
+
+# Lo que hace un worker con cada tarea: lo mismo que /analyze/. El Analize y el estado "completado" se guardan
+# en el mismo commit, así si el worker se cae en el medio la tarea se reintenta sin duplicar el análisis.
+async def procesar_tarea_de_analisis(db: AsyncSession, tarea: AnalysisTask) -> None:
+    client = await db.get(Client, tarea.client_id)
+    job = await db.get(Job, tarea.job_id)
+    if not client or not job:
+        raise TareaFallida("El cliente o el trabajo ya no existen")
+
+    await actualizar_etapa(db, tarea, "extrayendo_texto")
+    extension = os.path.splitext(tarea.file_name)[1].lower()
+    try:
+        resume_text = await extraer_texto_de_bytes_async(tarea.file_data, tarea.file_name, extension)
+    except HTTPException as e:
+        raise TareaFallida(e.detail)
+
+    await actualizar_etapa(db, tarea, "analizando")
+    funciones_del_trabajo, perfil_del_trabajador = await textos_del_trabajo(db, job)
+    try:
+        async with asyncio.TaskGroup() as tg:
+            task1 = tg.create_task(
+                generate_gpt_feedback_async(resume_text, client.name, funciones_del_trabajo, perfil_del_trabajador))
+            task2 = tg.create_task(
+                match_resume_to_job_embedding_async(db, job.id, resume_text, funciones_del_trabajo, perfil_del_trabajador))
+    except* Exception as grupo:
+        # Igual que en /analyze/: el error de la tarea queda con la causa real y no "unhandled errors in a TaskGroup"
+        raise grupo.exceptions[0]
+    feedback = task1.result()
+    match_score, resume_embedding = task2.result()
+
+    await actualizar_etapa(db, tarea, "guardando")
+    new_analysis = Analize(
+        feedback=feedback["feedback"],
+        match_score=match_score,
+        decision=calcular_decision(match_score),
+        file_name=tarea.file_name,
+        job_title=job.title,
+        name=tarea.nombre_del_candidato,
+    )
+    db.add(new_analysis)
+    await db.flush()
+    tarea.analisis_id = new_analysis.id
+    tarea.estado = "completado"
+    tarea.etapa = "completado"
+    tarea.error = None
+    tarea.file_data = None
+    await db.commit()
+    await indexar_cvs([new_analysis.id], [resume_embedding])
+
+tareas_pool = TaskWorkerPool(
+    AsyncSessionLocal,
+    procesar_tarea_de_analisis,
+    workers=ANALYSIS_TASK_WORKERS,
+    poll_seconds=ANALYSIS_TASK_POLL_SECONDS,
+    lease_seconds=ANALYSIS_TASK_LEASE_SECONDS,
+    max_intentos=ANALYSIS_TASK_MAX_ATTEMPTS,
+)
+
+# Variante en streaming (SSE) de /analyze/: manda el evento "score" apenas termina el embedding,
+# después los fragmentos del feedback ("feedback") y al final "done" con el análisis guardado.
+# La sesión de get_db se cierra antes de que empiece el stream, por eso el generador abre la suya.
+@app.post("/analyze/stream/", dependencies=[Depends(check_signed_in), Depends(require_model)])
+async def analyze_resume_stream(
+    file: UploadFile = File(...),
+    job_id: int = Form(...),
+    client_id: int = Form(...),
+    nombre_del_candidato: str = Form(...),
+    db: AsyncSession = Depends(get_async_db)
+):
+    client = await db.get(Client, client_id)
+    if not client:
+        return {"error": "Cliente no encontrado"}
+
+    job = await db.get(Job, job_id)
+    if not job:
+        return {"error": "Trabajo no encontrado"}
+
+    funciones_del_trabajo, perfil_del_trabajador = await textos_del_trabajo(db, job)
+    resume_text = await extract_text_async(file)
+    prompt = construir_prompt_analisis(resume_text, client.name, funciones_del_trabajo, perfil_del_trabajador)
+    job_id, job_title, file_name = job.id, job.title, file.filename
+
+    async def eventos():
+        stream_db = AsyncSessionLocal()
+        cola = asyncio.Queue()
+
+        async def producir_score():
+            try:
+                match_score, resume_embedding = await match_resume_to_job_embedding_async(stream_db, job_id, resume_text, funciones_del_trabajo, perfil_del_trabajador)
+                await cola.put(("score", (match_score, resume_embedding)))
+            except Exception as e:
+                await cola.put(("error", str(e)))
+
+        async def producir_feedback():
+            try:
+                async for delta in generar_respuesta_llm_stream(SYSTEM_PROMPT_ANALISIS, prompt):
+                    await cola.put(("feedback", delta))
+                await cola.put(("fin_feedback", None))
+            except Exception as e:
+                await cola.put(("error", f"Error al comunicarse con OpenAI: {e}"))
+
+        tareas = [asyncio.create_task(producir_score()), asyncio.create_task(producir_feedback())]
+
+        try:
+            match_score = None
+            partes = []
+            feedback_completo = False
+            while match_score is None or not feedback_completo:
+                tipo, valor = await cola.get()
+                if tipo == "error":
+                    yield evento_sse("error", {"detail": valor})
+                    return
+                if tipo == "score":
+                    match_score, resume_embedding = valor
+                    yield evento_sse("score", {"match_score": match_score, "decision": calcular_decision(match_score)})
+                elif tipo == "feedback":
+                    partes.append(valor)
+                    yield evento_sse("feedback", {"delta": valor})
+                else:
+                    feedback_completo = True
+
+            # Guardar el análisis cuando el stream terminó
+            new_analysis = Analize(
+                feedback="".join(partes),
+                match_score=match_score,
+                decision=calcular_decision(match_score),
+                file_name=file_name,
+                job_title=job_title,
+                name=nombre_del_candidato,
+            )
+            stream_db.add(new_analysis)
+            await stream_db.commit()
+            await indexar_cvs([new_analysis.id], [resume_embedding])
+            yield evento_sse("done", {
+                "id": new_analysis.id,
+                "file_name": file_name,
+                "job_title": job_title,
+                "match_score": match_score,
+                "name": new_analysis.name,
+                "decision": new_analysis.decision,
+                "created_at": new_analysis.created_at
+            })
+        finally:
+            # Igual que en feedback_candidato_stream: si el cliente se desconectó el generador está cancelado,
+            # así que se espera a las tareas y se cierra la sesión dentro de un shield para no perder la conexión
+            for tarea in tareas:
+                tarea.cancel()
+            with anyio.CancelScope(shield=True):
+                await asyncio.gather(*tareas, return_exceptions=True)
+                await stream_db.close()
+
+    return StreamingResponse(eventos(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+# ==========================================================
+# Analizar varios CV para un mismo trabajo (en lote)
+# ==========================================================
+
+@app.post("/analyze/batch/", dependencies=[Depends(check_signed_in), Depends(require_model)])
+async def analyze_resume_batch(
+    files: List[UploadFile] = File(...),
+    job_id: int = Form(...),
+    client_id: int = Form(...),
+    nombres_de_candidatos: Optional[List[str]] = Form(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if len(files) > BATCH_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"Se aceptan como máximo {BATCH_MAX_FILES} archivos por lote.")
+    if nombres_de_candidatos and len(nombres_de_candidatos) != len(files):
+        raise HTTPException(status_code=400, detail="La cantidad de nombres no coincide con la cantidad de archivos.")
+
+    client = await db.get(Client, client_id)
+    if not client:
+        return {"error": "Cliente no encontrado"}
+
+    job = await db.get(Job, job_id)
+    if not job:
+        return {"error": "Trabajo no encontrado"}
+
+    funciones_del_trabajo, perfil_del_trabajador = await textos_del_trabajo(db, job)
+
+    # Extraer el texto de cada CV (en paralelo en el pool), los que fallan o vienen vacíos se reportan como error.
+    # Cada archivo se lee recién cuando tiene lugar para parsearse, así en memoria hay a lo sumo
+    # max_concurrency archivos del lote a la vez (el resto sigue en el spool de disco del upload)
+    lectura = asyncio.Semaphore(extraction_pool.max_concurrency)
+
+    async def extraer_limitado(file: UploadFile) -> str:
+        async with lectura:
+            return await extract_text_async(file)
+
+    # resultados queda en el mismo orden en que se subieron los archivos
+    resultados = [None] * len(files)
+    candidatos = []
+    textos = await asyncio.gather(*(extraer_limitado(file) for file in files), return_exceptions=True)
+    for i, (file, resume_text) in enumerate(zip(files, textos)):
+        nombre = nombres_de_candidatos[i] if nombres_de_candidatos else os.path.splitext(file.filename)[0]
+        if isinstance(resume_text, HTTPException):
+            resultados[i] = {"file_name": file.filename, "name": nombre, "error": resume_text.detail}
+            continue
+        if isinstance(resume_text, Exception):
+            # Un error inesperado con un archivo no tira abajo el lote entero
+            logger.warning("Error al extraer el texto en lote: %s", resume_text, extra={"datos": {"file_name": file.filename}})
+            resultados[i] = {"file_name": file.filename, "name": nombre, "error": "No se pudo procesar el archivo."}
+            continue
+        if isinstance(resume_text, BaseException):
+            raise resume_text
+        if not resume_text.strip():
+            resultados[i] = {"file_name": file.filename, "name": nombre, "error": "El archivo no contiene texto válido."}
+            continue
+        candidatos.append((i, file.filename, nombre, resume_text))
+
+    if not candidatos:
+        return {"job_title": job.title, "resultados": resultados}
+
+    # Limitamos cuántas llamadas a GPT corren a la vez para no saturar la API
+    semaforo = asyncio.Semaphore(BATCH_FEEDBACK_CONCURRENCY)
+
+    async def feedback_limitado(resume_text: str):
+        async with semaforo:
+            try:
+                return await generate_gpt_feedback_async(resume_text, client.name, funciones_del_trabajo, perfil_del_trabajador)
+            except Exception as e:
+                logger.warning("Error al generar feedback en lote: %s", e)
+                return None
+
+    resume_texts = [resume_text for _, _, _, resume_text in candidatos]
+    (match_scores, resume_embeddings), *feedbacks = await asyncio.gather(
+        match_resumes_to_job_batch_async(db, job.id, resume_texts, funciones_del_trabajo, perfil_del_trabajador),
+        *(feedback_limitado(resume_text) for resume_text in resume_texts),
+    )
+
+    # Guardar todos los análisis con un solo commit. Si GPT falló el análisis se guarda con el puntaje y
+    # feedback NULL (no un texto de relleno, que después aparecería en la búsqueda y en el listado)
+    nuevos = []
+    for (_, file_name, nombre, _), match_score, feedback in zip(candidatos, match_scores, feedbacks):
+        nuevos.append(Analize(
+            feedback=feedback["feedback"] if feedback is not None else None,
+            match_score=match_score,
+            decision=calcular_decision(match_score),
+            file_name=file_name,
+            job_title=job.title,
+            name=nombre,
+        ))
+    db.add_all(nuevos)
+    await db.commit()
+    await indexar_cvs([analisis.id for analisis in nuevos], resume_embeddings)
+
+    # feedback es siempre {"feedback": ...} como en /analyze/, o null con feedback_error si GPT falló
+    for (i, _, _, _), analisis, feedback in zip(candidatos, nuevos, feedbacks):
+        resultados[i] = {
+            "id": analisis.id,
+            "file_name": analisis.file_name,
+            "job_title": analisis.job_title,
+            "match_score": analisis.match_score,
+            "name": analisis.name,
+            "decision": analisis.decision,
+            "feedback": feedback,
+            "created_at": analisis.created_at
+        }
+        if feedback is None:
+            resultados[i]["feedback_error"] = "No se pudo generar feedback"
+
+    return {"job_title": job.title, "resultados": resultados}
+
+# ==========================================================
+# Buscar candidatos ya analizados que encajen con un trabajo
+# ==========================================================
+
+@app.get("/trabajos/{job_id}/candidatos_similares", dependencies=[Depends(check_signed_in), Depends(require_model)])
+async def candidatos_similares(
+    job_id: int,
+    k: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    if vector_index is None:
+        raise HTTPException(status_code=503, detail="El índice de vectores no está configurado.")
+
+    job = await db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+
+    # Se compara el embedding del trabajo contra los CV guardados, sin volver a codificar ningún CV
+    funciones_del_trabajo, perfil_del_trabajador = await textos_del_trabajo(db, job)
+    job_embedding = await obtener_embedding_del_trabajo(db, job.id, funciones_del_trabajo, perfil_del_trabajador)
+    loop = asyncio.get_running_loop()
+    resultados = await loop.run_in_executor(executor, vector_index.search, job_embedding, k)
+
+    analisis = {a.id: a for a in (await db.scalars(select(Analize).where(Analize.id.in_([id for id, _ in resultados])))).all()}
+    return [
+        {
+            "id": analisis[id].id,
+            "name": analisis[id].name,
+            "file_name": analisis[id].file_name,
+            "job_title": analisis[id].job_title,
+            "similitud": round(similitud, 2),
+            "created_at": analisis[id].created_at,
+        }
+        for id, similitud in resultados if id in analisis
+    ]
+
 # Verificación de que FastAPI está funcionando en producción
 @app.get("/")
 def read_root():
     return {"message": "FastAPI funcionando correctamente en Railway!"}
 
+# Readiness: 200 solo cuando el modelo ya se cargó y calentó, mientras tanto 503
+@app.get("/ready")
+def ready():
+    if not model_ready.is_set():
+        return JSONResponse(status_code=503, content={"status": "cargando"})
+    return {"status": "listo"}
+
+# Métricas para Prometheus
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    contenido, content_type = exportar()
+    return Response(content=contenido, media_type=content_type)
+
+# Métricas de llenado de los lotes del servicio de embeddings
+@app.get("/embeddings/stats", dependencies=[Depends(check_signed_in)])
+def embeddings_stats():
+    return embedding_service.stats()
+
 
 # ==========================================================
 # Aqui esta el endpoint para contactos
@@ -395,33 +1163,10 @@ async def create_contact(
 # Aqui esta el endpoint feedback candidatos
 # ==========================================================
 
-@app.post("/feedbackCandidate/", dependencies=[Depends(check_signed_in)])
-async def feedback_candidato(
-    file: UploadFile = File(...),
-    profesion: str = Form(...), 
-    user_payload: any = Depends(request_state_payload),
-    db: Session = Depends(get_db)
-):
-    perfil = db.query(Candidate).filter(Candidate.external_user_id == user_payload["sub"]).one_or_none()
-    if not perfil:
-        raise HTTPException(status_code=404, detail="perfil no encontrado")
-    if not can_use_app (user_id = perfil.id, db=db): 
-        raise HTTPException(status_code=403, detail="Has alcanzado tu límite de uso. Por favor, actualiza tu plan para continuar.")
-    
-    # Validar tipo de archivo
-    if not (file.filename.endswith(".pdf") or file.filename.endswith(".docx")):
-        raise HTTPException(status_code=400, detail="Solo se aceptan archivos PDF o DOCX.")
-
-    # Extraer texto del archivo
-    resume_text = extract_text(file)
+SYSTEM_PROMPT_FEEDBACK_CANDIDATO = "Eres un experto en asesorar a las personas para elaborar sus currículums de forma profesional."
 
-    # Validar que el texto extraído no esté vacío
-    if not resume_text.strip():
-        raise HTTPException(status_code=400, detail="El archivo no contiene texto válido.")
-    
-    
-    # Crear prompt
-    prompt = f"""
+def construir_prompt_feedback_candidato(resume_text: str, profesion: str) -> str:
+    return f"""
     Eres un asesor experto en recursos humanos y especialista en evaluar currículums. 
     Por favor, revisa cuidadosamente el siguiente CV y proporciona un análisis equilibrado que incluya:
     - Las fortalezas y habilidades clave del candidato.
@@ -440,19 +1185,55 @@ async def feedback_candidato(
     Feedback:
     """
 
-    # Llamar a la API de OpenAI para generar el feedback
+# Valida perfil y archivo, reserva un uso y devuelve (perfil, texto del CV).
+# Si el archivo no es válido el uso reservado se libera antes de responder el error.
+async def validar_feedback_candidato(file: UploadFile, user_payload, db: AsyncSession) -> tuple:
+    perfil = (await db.scalars(select(Candidate).where(Candidate.external_user_id == user_payload["sub"]))).one_or_none()
+    if not perfil:
+        raise HTTPException(status_code=404, detail="perfil no encontrado")
+    with etapa("feedbackCandidate", "db_commit"):
+        reservado = await reservar_uso(perfil.id, db)
+    if not reservado:
+        raise HTTPException(status_code=403, detail="Has alcanzado tu límite de uso. Por favor, actualiza tu plan para continuar.")
+
     try:
-        response = await async_client.responses.create(
-            model="gpt-4o-mini",
-            input=[
-                {"role": "system", "content": "Eres un experto en asesorar a las personas para elaborar sus currículums de forma profesional."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-        feedback_text = response.output_text
-        increment_usage(user_id = perfil.id, db=db)  # Incrementar el uso de la app
+        # Extraer texto del archivo (extract_text_async valida tamaño y tipo real del archivo)
+        with etapa("feedbackCandidate", "extraction"):
+            resume_text = await extract_text_async(file)
+
+        # Validar que el texto extraído no esté vacío
+        if not resume_text.strip():
+            raise HTTPException(status_code=400, detail="El archivo no contiene texto válido.")
+    except BaseException:
+        await liberar_uso(perfil.id, db)
+        raise
+
+    return perfil, resume_text
+
+@app.post("/feedbackCandidate/", dependencies=[Depends(check_signed_in)])
+async def feedback_candidato(
+    file: UploadFile = File(...),
+    profesion: str = Form(...), 
+    user_payload: any = Depends(request_state_payload),
+    db: AsyncSession = Depends(get_async_db)
+):
+    perfil, resume_text = await validar_feedback_candidato(file, user_payload, db)
+
+    # Crear prompt
+    prompt = construir_prompt_feedback_candidato(resume_text, profesion)
+
+    # Llamar a la API de OpenAI para generar el feedback; el uso ya está reservado y se devuelve si falla
+    try:
+        with etapa("feedbackCandidate", "llm"), medir_tiempo("gpt"):
+            feedback_text, desde_cache = await generar_respuesta_llm(SYSTEM_PROMPT_FEEDBACK_CANDIDATO, prompt)
+    except LLMNoDisponible as e:
+        await liberar_uso(perfil.id, db)
+        raise llm_no_disponible(e)
     except Exception as e:
+        await liberar_uso(perfil.id, db)
         raise HTTPException(status_code=500, detail=f"Error al comunicarse con OpenAI: {e}")
+    if desde_cache and not FEEDBACK_CANDIDATE_CACHE_HIT_COUNTS_USAGE:
+        await liberar_uso(perfil.id, db)
 
     # Retornar el feedback generado
     return {
@@ -463,6 +1244,41 @@ async def feedback_candidato(
         "name": f"{perfil.firstname} {perfil.lastname}",
     }
 
+# Variante en streaming (SSE) de /feedbackCandidate/: manda "feedback" con cada fragmento y "done" al final.
+# El uso se reserva antes de empezar y se libera si el stream no termina bien (error o el cliente se desconecta).
+@app.post("/feedbackCandidate/stream/", dependencies=[Depends(check_signed_in)])
+async def feedback_candidato_stream(
+    file: UploadFile = File(...),
+    profesion: str = Form(...), 
+    user_payload: any = Depends(request_state_payload),
+    db: AsyncSession = Depends(get_async_db)
+):
+    perfil, resume_text = await validar_feedback_candidato(file, user_payload, db)
+    prompt = construir_prompt_feedback_candidato(resume_text, profesion)
+    perfil_id, nombre = perfil.id, f"{perfil.firstname} {perfil.lastname}"
+
+    async def eventos():
+        desde_cache = llm_cache.get(ResponseCache.key_for("gpt-4o-mini", SYSTEM_PROMPT_FEEDBACK_CANDIDATO, prompt)) is not None
+        cuenta_uso = False
+        try:
+            try:
+                async for delta in generar_respuesta_llm_stream(SYSTEM_PROMPT_FEEDBACK_CANDIDATO, prompt):
+                    yield evento_sse("feedback", {"delta": delta})
+            except Exception as e:
+                yield evento_sse("error", {"detail": f"Error al comunicarse con OpenAI: {e}"})
+                return
+            cuenta_uso = not desde_cache or FEEDBACK_CANDIDATE_CACHE_HIT_COUNTS_USAGE
+            yield evento_sse("done", {"profesion": profesion, "name": nombre})
+        finally:
+            # Si el cliente se desconecta, Starlette cancela el generador y cualquier await acá se volvería
+            # a cancelar: el shield deja que la devolución del uso llegue a hacer commit y cierre la sesión
+            if not cuenta_uso:
+                with anyio.CancelScope(shield=True):
+                    async with AsyncSessionLocal() as stream_db:
+                        await liberar_uso(perfil_id, stream_db)
+
+    return StreamingResponse(eventos(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 # ==========================================================
 # Aqui esta el endpoint de los perfiles
 # ==========================================================
@@ -512,46 +1328,134 @@ async def eliminar_perfil(perfil_id: int, db: Session = Depends(get_db)):
 # Funcion para consultar los analisis de los candidatos.
 # ==========================================================
 
+# Columnas por las que se puede ordenar /analisis/. El segundo valor reemplaza los NULL para que
+# la comparación del cursor (keyset) funcione también con filas sin valor.
+COLUMNAS_ORDENABLES = {
+    "match_score": (Analize.match_score, -1.0),
+    "created_at": (Analize.created_at, datetime.min),
+    "name": (Analize.name, ""),
+    "job_title": (Analize.job_title, ""),
+    "id": (Analize.id, 0),
+}
+
+# Tipo que tiene que tener en el cursor el valor de orden de cada order_by (created_at va como texto ISO).
+# Un cursor de otro order_by se rechaza con 400 en vez de llegar a Postgres como una comparación inválida.
+TIPOS_DE_CURSOR = {
+    "relevancia": (int, float),
+    "match_score": (int, float),
+    "created_at": str,
+    "name": str,
+    "job_title": str,
+    "id": int,
+}
+
+# El cursor es el (valor de orden, id) de la última fila de la página, en base64 para que sea opaco
+def codificar_cursor(valor, id: int) -> str:
+    if isinstance(valor, datetime):
+        valor = valor.isoformat()
+    return base64.urlsafe_b64encode(json.dumps([valor, id]).encode("utf-8")).decode("ascii")
+
+def decodificar_cursor(cursor: str, order_by: str) -> tuple:
+    try:
+        valor, id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        if isinstance(valor, bool) or not isinstance(valor, TIPOS_DE_CURSOR[order_by]):
+            raise ValueError("el cursor no corresponde a order_by")
+        if order_by == "created_at":
+            valor = datetime.fromisoformat(valor)
+        return valor, int(id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido.")
+
+# Paginación por cursor: la respuesta sigue siendo la lista de análisis y el cursor de la
+# siguiente página va en el header X-Next-Cursor (no viene si ya no hay más resultados).
+# Con "buscar" se hace búsqueda de texto completo sobre el feedback y por defecto se ordena por relevancia.
 @app.get("/analisis/", response_model=List[AnalizeSchema],dependencies=[Depends(check_signed_in)])
 def listar_analisis(
+    response: Response,
     db: Session = Depends(get_db),
     name: Optional[str] = None,
     job_title: Optional[str] = None,
-    order_by: Optional[str] = "match_score",
+    buscar: Optional[str] = None,
+    order_by: Optional[str] = None,
         ascending: Optional[bool] = False,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
 ):
-    query = db.query(Analize)
+    if order_by is None:
+        order_by = "relevancia" if buscar else "match_score"
+    if order_by == "relevancia" and not buscar:
+        raise HTTPException(status_code=400, detail="order_by=relevancia solo se puede usar junto con buscar.")
+    if order_by != "relevancia" and order_by not in COLUMNAS_ORDENABLES:
+        raise HTTPException(status_code=400, detail=f"order_by debe ser relevancia o uno de: {', '.join(COLUMNAS_ORDENABLES)}")
+
+    tsquery = func.websearch_to_tsquery("spanish", buscar) if buscar else None
+
+    # El id desempata filas con el mismo valor, así el orden es estable entre páginas
+    if order_by == "relevancia":
+        # ts_rank_cd devuelve real (float4): con el cast a double precision el valor que vuelve en el cursor
+        # es exactamente el que se compara, y las filas empatadas en relevancia no se saltean ni se repiten
+        order_field = cast(func.ts_rank_cd(Analize.feedback_tsv, tsquery), Float(53))
+    elif order_by == "id":
+        order_field = Analize.id
+    else:
+        columna, valor_nulo = COLUMNAS_ORDENABLES[order_by]
+        order_field = func.coalesce(columna, valor_nulo)
+
+    # Se trae el valor de orden junto con cada fila para armar el cursor de la siguiente página
+    query = db.query(Analize, order_field)
 
     if name:
         query = query.filter(Analize.name.ilike(f"%{name}%"))
     if job_title:
         query = query.filter(Analize.job_title.ilike(f"%{job_title}%"))
+    if buscar:
+        # @@ con el tsquery usa el índice GIN sobre feedback_tsv
+        query = query.filter(Analize.feedback_tsv.op("@@")(tsquery))
+
+    if cursor:
+        clave = tuple_(order_field, Analize.id)
+        valor_cursor = tuple_(*decodificar_cursor(cursor, order_by))
+        query = query.filter(clave > valor_cursor if ascending else clave < valor_cursor)
+    if ascending:
+        query = query.order_by(order_field.asc(), Analize.id.asc())
+    else:
+        query = query.order_by(order_field.desc(), Analize.id.desc())
 
-    order_field = getattr(Analize, order_by)
-    query = query.order_by(order_field.asc() if ascending else order_field.desc())
-    
-
+    # Pedimos una fila de más para saber si hay otra página
+    filas = query.limit(limit + 1).all()
+    if len(filas) > limit:
+        filas = filas[:limit]
+        ultimo, valor = filas[-1]
+        response.headers["X-Next-Cursor"] = codificar_cursor(valor, ultimo.id)
 
-    return query.all()
+    return [analisis for analisis, _ in filas]
 
 
 # ==========================================================
 # Funciones de los usuarios cuando cada vez realizan una acción de uso.
 # ==========================================================
-# función donde increment_usage se incrementa cada vez que el usuario usa la aplicación.
-def increment_usage(user_id: int, db: Session =Depends(get_db)):
-    usage = db.query(Usage).filter(Usage.user_id == user_id).first()
-    if usage.usage_count < usage.usage_limit:
-        usage.usage_count += 1
-        db.commit()
-        return True
-    else:
-        return False # si el usuario ha alcanzado su límite de uso, no se incrementa el contador.
-    
-# Bloquear el acceso si el usuario ha alcanzado su límite de uso
-def can_use_app(user_id: int, db: Session = Depends(get_db)):
-    usage = db.query(Usage).filter(Usage.user_id == user_id).first()  # Si can_use_app devuelve False significa que el usuario no puede usar mas la app.
-    return usage.usage_count < usage.usage_limit
+# Reserva un uso antes de llamar a OpenAI: el chequeo del límite y el incremento son un solo UPDATE atómico,
+# así requests concurrentes del mismo usuario no pueden pasarse de usage_limit.
+# Devuelve False si el usuario ya alcanzó su límite (o no tiene fila de uso).
+async def reservar_uso(user_id: int, db: AsyncSession) -> bool:
+    reservado = (await db.execute(
+        update(Usage)
+        .where(Usage.user_id == user_id, Usage.usage_count < Usage.usage_limit)
+        .values(usage_count=Usage.usage_count + 1)
+        .returning(Usage.usage_count)
+    )).first()
+    await db.commit()
+    return reservado is not None
+
+# Devuelve un uso reservado cuando el pedido no terminó (error de OpenAI, archivo inválido, stream cortado)
+# o cuando no cuenta como uso (respuesta del cache con FEEDBACK_CANDIDATE_CACHE_HIT_COUNTS_USAGE desactivado)
+async def liberar_uso(user_id: int, db: AsyncSession) -> None:
+    await db.execute(
+        update(Usage)
+        .where(Usage.user_id == user_id, Usage.usage_count > 0)
+        .values(usage_count=Usage.usage_count - 1)
+    )
+    await db.commit()
 
 # Integrar con  el metodo de pago.
 def upgrade_plan(user_id, new_limit: int, db: Session = Depends(get_db)):
@@ -564,4 +1468,5 @@ def upgrade_plan(user_id, new_limit: int, db: Session = Depends(get_db)):
 # Configuración para producción
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 8000)) 
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # log_config=None: uvicorn no pone sus propios handlers y sus logs (incluido el access log) salen por la cola
+    uvicorn.run(app, host="0.0.0.0", port=port, log_config=None)
@@ -0,0 +1,81 @@
+import time
+from contextlib import contextmanager
+
+from prometheus_client import CONTENT_TYPE_LATEST, Counter, Gauge, Histogram, generate_latest
+
+# Métricas en formato Prometheus, expuestas en /metrics.
+# Cada proceso de uvicorn tiene sus propios contadores; Prometheus junta los valores de todas las instancias.
+
+REQUESTS = Counter(
+    "http_requests_total", "Requests HTTP atendidos", ["method", "route", "status"],
+)
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Latencia de los requests HTTP por ruta", ["method", "route"],
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60),
+)
+# Etapas del camino caliente de análisis: extraction, encode, llm y db_commit
+STAGE_SECONDS = Histogram(
+    "analysis_stage_duration_seconds", "Duración de cada etapa del análisis", ["endpoint", "stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60),
+)
+EXECUTOR_QUEUE = Gauge("executor_queue_depth", "Tareas esperando en la cola del ThreadPoolExecutor")
+DB_POOL_CHECKED_OUT = Gauge("db_pool_checked_out", "Conexiones del pool de la base de datos en uso", ["engine"])
+OPENAI_IN_FLIGHT = Gauge("openai_in_flight_requests", "Llamadas a OpenAI en curso")
+EMBEDDING_BATCH_FILL = Gauge("embedding_batch_fill_ratio", "Llenado promedio de los lotes del servicio de embeddings")
+
+
+# Registra las funciones que leen el valor de los gauges en el momento del scrape
+def registrar_gauges(executor, engines: dict, llm_gateway, embedding_service) -> None:
+    EXECUTOR_QUEUE.set_function(lambda: executor._work_queue.qsize())
+    for nombre, engine in engines.items():
+        DB_POOL_CHECKED_OUT.labels(nombre).set_function(lambda engine=engine: engine.pool.checkedout())
+    OPENAI_IN_FLIGHT.set_function(lambda: llm_gateway.en_vuelo)
+    EMBEDDING_BATCH_FILL.set_function(lambda: embedding_service.stats()["llenado_promedio"])
+
+
+@contextmanager
+def etapa(endpoint: str, stage: str):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.labels(endpoint, stage).observe(time.perf_counter() - inicio)
+
+
+async def medir(endpoint: str, stage: str, awaitable):
+    with etapa(endpoint, stage):
+        return await awaitable
+
+
+def exportar() -> tuple:
+    return generate_latest(), CONTENT_TYPE_LATEST
+
+
+# Middleware ASGI que cuenta requests y mide su latencia. La ruta es el template de FastAPI
+# (/analyze/tareas/{task_id}), no la URL real, así los ids no multiplican las series.
+class MetricsMiddleware:
+    def __init__(self, app, excluir=("/metrics",)):
+        self.app = app
+        self.excluir = set(excluir)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.excluir:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        inicio = time.perf_counter()
+
+        async def send_con_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_con_status)
+        finally:
+            route = scope.get("route")
+            ruta = route.path if route is not None else "sin_ruta"
+            REQUESTS.labels(scope["method"], ruta, str(status)).inc()
+            REQUEST_SECONDS.labels(scope["method"], ruta).observe(time.perf_counter() - inicio)
@@ -0,0 +1,178 @@
+import functools
+import inspect
+import json
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Optional
+
+from sqlalchemy import event
+
+# Perfilado por request: cuánto tiempo se fue en cada etapa (extracción, match, GPT, base de datos, auth).
+# El middleware crea un Colector por request y lo deja en un ContextVar; los hooks suman ahí su duración.
+# Las tareas de asyncio y el threadpool copian el contexto, así que ven el mismo colector.
+# Con el perfilado desactivado el ContextVar queda en None y cada hook es un get() y un if.
+
+_colector: ContextVar[Optional["Colector"]] = ContextVar("server_timing", default=None)
+
+
+class Colector:
+    __slots__ = ("etapas", "inicio")
+
+    def __init__(self):
+        self.etapas = {}
+        self.inicio = perf_counter()
+
+    def registrar(self, nombre: str, segundos: float) -> None:
+        total = self.etapas.get(nombre)
+        if total is None:
+            self.etapas[nombre] = [segundos, 1]
+        else:
+            total[0] += segundos
+            total[1] += 1
+
+    # Las etapas que corren en paralelo (GPT y match en el TaskGroup) se suman cada una por su lado,
+    # por eso la suma de las etapas puede ser mayor que el total del request
+    def server_timing(self) -> str:
+        partes = [
+            f'{nombre};dur={segundos * 1000:.1f};desc="{cantidad}x"'
+            for nombre, (segundos, cantidad) in self.etapas.items()
+        ]
+        partes.append(f"total;dur={(perf_counter() - self.inicio) * 1000:.1f}")
+        return ", ".join(partes)
+
+    def detalle(self) -> dict:
+        return {
+            "total_ms": round((perf_counter() - self.inicio) * 1000, 1),
+            "etapas": {
+                nombre: {"ms": round(segundos * 1000, 1), "llamadas": cantidad}
+                for nombre, (segundos, cantidad) in self.etapas.items()
+            },
+        }
+
+
+class medir_tiempo:
+    __slots__ = ("nombre", "colector", "inicio")
+
+    def __init__(self, nombre: str):
+        self.nombre = nombre
+
+    def __enter__(self):
+        self.colector = _colector.get()
+        if self.colector is not None:
+            self.inicio = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        if self.colector is not None:
+            self.colector.registrar(self.nombre, perf_counter() - self.inicio)
+        return False
+
+
+# Decorador para funciones sync o async: mide cada llamada como la etapa `nombre`
+def perfilado(nombre: str):
+    def decorador(fn):
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                colector = _colector.get()
+                if colector is None:
+                    return await fn(*args, **kwargs)
+                inicio = perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                finally:
+                    colector.registrar(nombre, perf_counter() - inicio)
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                colector = _colector.get()
+                if colector is None:
+                    return fn(*args, **kwargs)
+                inicio = perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    colector.registrar(nombre, perf_counter() - inicio)
+        return wrapper
+    return decorador
+
+
+# Cada consulta SQL del engine (sync, o el sync_engine de un AsyncEngine) se suma a la etapa "db"
+def instrumentar_engine(engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        if _colector.get() is not None:
+            conn.info.setdefault("server_timing_inicio", []).append(perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        colector = _colector.get()
+        inicios = conn.info.get("server_timing_inicio")
+        if colector is not None and inicios:
+            colector.registrar("db", perf_counter() - inicios.pop())
+
+
+# Middleware ASGI que agrega el header Server-Timing. Con `debug` activado y el header X-Debug-Timing: 1
+# en el request, si la respuesta es un objeto JSON se le agrega "_timing" con el detalle completo.
+class ServerTimingMiddleware:
+    def __init__(self, app, debug: bool = False):
+        self.app = app
+        self.debug = debug
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        colector = Colector()
+        token = _colector.set(colector)
+        debug = self.debug and (b"x-debug-timing", b"1") in scope["headers"]
+        try:
+            if debug:
+                await self._con_detalle(scope, receive, send, colector)
+            else:
+                async def send_con_header(message):
+                    if message["type"] == "http.response.start":
+                        message.setdefault("headers", [])
+                        message["headers"] = list(message["headers"]) + [(b"server-timing", colector.server_timing().encode())]
+                    await send(message)
+                await self.app(scope, receive, send_con_header)
+        finally:
+            _colector.reset(token)
+
+    # Retiene la respuesta JSON hasta el final para poder agregarle el detalle; las demás pasan tal cual
+    async def _con_detalle(self, scope, receive, send, colector: Colector):
+        inicio_respuesta = None
+        partes = []
+
+        async def send_con_detalle(message):
+            nonlocal inicio_respuesta
+            if message["type"] == "http.response.start":
+                headers = dict(message.get("headers", []))
+                if headers.get(b"content-type", b"").startswith(b"application/json"):
+                    inicio_respuesta = message
+                    return
+                message["headers"] = list(message.get("headers", [])) + [(b"server-timing", colector.server_timing().encode())]
+                await send(message)
+                return
+            if inicio_respuesta is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            partes.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(partes)
+            try:
+                contenido = json.loads(body)
+                if isinstance(contenido, dict):
+                    contenido["_timing"] = colector.detalle()
+                    body = json.dumps(contenido, ensure_ascii=False).encode()
+            except ValueError:
+                pass
+            headers = [(k, v) for k, v in inicio_respuesta.get("headers", []) if k != b"content-length"]
+            headers += [(b"content-length", str(len(body)).encode()), (b"server-timing", colector.server_timing().encode())]
+            await send({**inicio_respuesta, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_con_detalle)
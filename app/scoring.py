@@ -0,0 +1,56 @@
+from typing import List, Tuple
+
+import numpy as np
+
+
+# all-MiniLM-L6-v2 corta la entrada en 256 word pieces, así que un CV largo se divide en ventanas
+# de palabras que se solapan. Cada ventana se codifica por separado y después se junta el puntaje.
+
+def dividir_en_ventanas(texto: str, palabras_por_ventana: int, solapamiento: int, max_ventanas: int) -> List[str]:
+    palabras = texto.split()
+    if len(palabras) <= palabras_por_ventana:
+        return [" ".join(palabras)]
+
+    paso = max(1, palabras_por_ventana - solapamiento)
+    ventanas = []
+    for inicio in range(0, len(palabras), paso):
+        ventanas.append(" ".join(palabras[inicio:inicio + palabras_por_ventana]))
+        if inicio + palabras_por_ventana >= len(palabras) or len(ventanas) >= max_ventanas:
+            break
+    return ventanas
+
+
+# Divide varios CV y devuelve todas las ventanas juntas (para un solo encode) y dónde empieza cada CV
+def dividir_cvs_en_ventanas(textos: List[str], palabras_por_ventana: int, solapamiento: int, max_ventanas: int) -> Tuple[List[str], np.ndarray]:
+    ventanas = []
+    offsets = []
+    for texto in textos:
+        offsets.append(len(ventanas))
+        ventanas.extend(dividir_en_ventanas(texto, palabras_por_ventana, solapamiento, max_ventanas))
+    return ventanas, np.asarray(offsets, dtype=np.int64)
+
+
+def _normalizar(vectores: np.ndarray) -> np.ndarray:
+    vectores = np.asarray(vectores, dtype=np.float32)
+    return vectores / np.maximum(np.linalg.norm(vectores, axis=-1, keepdims=True), 1e-12)
+
+
+# Similitud coseno entre filas de a y el vector (o filas) de b, sin necesidad de torch
+def similitud_coseno(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return _normalizar(np.atleast_2d(a)) @ _normalizar(np.atleast_2d(b)).T
+
+
+# Similitud coseno de cada ventana contra el trabajo y pooling por CV ("max" o "mean"), todo vectorizado.
+# También devuelve un embedding por CV (el promedio normalizado de sus ventanas).
+def puntuar_ventanas(embeddings_ventanas: np.ndarray, offsets: np.ndarray, job_embedding: np.ndarray, pooling: str = "max") -> Tuple[np.ndarray, np.ndarray]:
+    ventanas = _normalizar(embeddings_ventanas)
+    similitudes = ventanas @ _normalizar(job_embedding).reshape(-1)
+    cantidades = np.diff(np.append(offsets, len(ventanas)))
+
+    if pooling == "mean":
+        scores = np.add.reduceat(similitudes, offsets) / cantidades
+    else:
+        scores = np.maximum.reduceat(similitudes, offsets)
+
+    embeddings_cv = _normalizar(np.add.reduceat(ventanas, offsets, axis=0) / cantidades[:, None])
+    return scores, embeddings_cv
@@ -0,0 +1,19 @@
+from sqlalchemy import event
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+
+
+# Para correr la app contra SQLite (tests y benchmarks, nunca en producción): solo Postgres tiene tsvector,
+# así que la columna se guarda como texto y to_tsvector devuelve el texto tal cual.
+@compiles(TSVECTOR, "sqlite")
+def _tsvector_como_texto(type_, compiler, **kw):
+    return "TEXT"
+
+
+def _funciones(dbapi_connection, connection_record):
+    dbapi_connection.create_function("to_tsvector", 2, lambda configuracion, texto: texto, deterministic=True)
+
+
+def preparar_sqlite(engines) -> None:
+    for engine in engines:
+        event.listen(engine, "connect", _funciones)
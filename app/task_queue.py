@@ -0,0 +1,145 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from database import AnalysisTask
+from logging_config import reset_request_id, set_request_id
+
+logger = logging.getLogger(__name__)
+
+
+# Error que no tiene sentido reintentar (archivo ilegible, trabajo borrado, etc.): la tarea pasa directo a "error"
+class TareaFallida(Exception):
+    pass
+
+
+# Toma la próxima tarea pendiente (o una "procesando" cuyo worker dejó de dar latidos) con
+# SELECT ... FOR UPDATE SKIP LOCKED, así varios workers, incluso en procesos distintos, nunca toman la misma.
+# La marca como procesando en la misma transacción; el UPDATE además exige que intentos no haya cambiado,
+# así en SQLite (que ignora FOR UPDATE) dos workers tampoco se quedan con la misma tarea.
+# Devuelve None si no hay nada para hacer.
+async def reclamar_tarea(db: AsyncSession, lease_seconds: int, max_intentos: int) -> Optional[AnalysisTask]:
+    while True:
+        ahora = datetime.utcnow()
+        candidata = (await db.execute(
+            select(AnalysisTask.id, AnalysisTask.intentos)
+            .where(or_(
+                AnalysisTask.estado == "pendiente",
+                and_(AnalysisTask.estado == "procesando", AnalysisTask.locked_at < ahora - timedelta(seconds=lease_seconds)),
+            ))
+            .order_by(AnalysisTask.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )).first()
+        if candidata is None:
+            await db.rollback()
+            return None
+
+        tarea_id, intentos = candidata
+        if intentos >= max_intentos:
+            # Se cayó el worker todas las veces que la tomó: no se vuelve a intentar
+            valores = dict(estado="error", error=func.coalesce(AnalysisTask.error, "Se superó la cantidad máxima de intentos"), file_data=None)
+        else:
+            valores = dict(estado="procesando", intentos=intentos + 1, locked_at=ahora)
+        resultado = await db.execute(
+            update(AnalysisTask)
+            .where(AnalysisTask.id == tarea_id, AnalysisTask.intentos == intentos)
+            .values(**valores)
+        )
+        await db.commit()
+        if resultado.rowcount == 0 or intentos >= max_intentos:
+            continue
+        return await db.get(AnalysisTask, tarea_id)
+
+
+# Guarda la etapa actual y renueva el latido de la tarea
+async def actualizar_etapa(db: AsyncSession, tarea: AnalysisTask, etapa: str) -> None:
+    tarea.etapa = etapa
+    tarea.locked_at = datetime.utcnow()
+    await db.commit()
+
+
+# Pool de workers (coroutines) que procesan la cola de tareas de análisis.
+# procesar(db, tarea) hace el trabajo y deja la tarea completada; si lanza TareaFallida la tarea queda en error,
+# y con cualquier otra excepción vuelve a pendiente hasta agotar max_intentos.
+class TaskWorkerPool:
+    def __init__(
+        self,
+        session_factory: async_sessionmaker,
+        procesar: Callable[[AsyncSession, AnalysisTask], Awaitable[None]],
+        workers: int = 2,
+        poll_seconds: float = 2,
+        lease_seconds: int = 300,
+        max_intentos: int = 3,
+    ):
+        self.session_factory = session_factory
+        self.procesar = procesar
+        self.workers = workers
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.max_intentos = max_intentos
+        self._tasks = []
+        self._hay_trabajo = None
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._hay_trabajo = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    # Despierta a los workers de este proceso sin esperar al próximo poll (los de otros procesos lo ven al hacer poll)
+    def notify(self) -> None:
+        if self._hay_trabajo is not None:
+            self._hay_trabajo.set()
+
+    def close(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                hizo_algo = await self._procesar_una()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Error en el worker de tareas de análisis")
+                hizo_algo = False
+            if hizo_algo:
+                continue
+            self._hay_trabajo.clear()
+            try:
+                await asyncio.wait_for(self._hay_trabajo.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _procesar_una(self) -> bool:
+        async with self.session_factory() as db:
+            tarea = await reclamar_tarea(db, self.lease_seconds, self.max_intentos)
+            if tarea is None:
+                return False
+            tarea_id = tarea.id
+            # Los logs de la tarea quedan correlacionados con su id, como los de un request
+            token = set_request_id(f"tarea-{tarea_id}")
+            try:
+                await self.procesar(db, tarea)
+            except Exception as e:
+                logger.warning("Falló la tarea de análisis: %s", e, extra={"datos": {"task_id": tarea_id}})
+                await db.rollback()
+                tarea = await db.get(AnalysisTask, tarea_id)
+                tarea.error = str(e) or type(e).__name__
+                if isinstance(e, TareaFallida) or tarea.intentos >= self.max_intentos:
+                    tarea.estado = "error"
+                    tarea.file_data = None
+                else:
+                    tarea.estado = "pendiente"
+                    tarea.etapa = "en_cola"
+                await db.commit()
+            finally:
+                reset_request_id(token)
+            return True
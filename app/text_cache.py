@@ -0,0 +1,57 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+
+# Cache del texto extraído de los CV, la clave es el SHA-256 de los bytes del archivo.
+# Tiene dos niveles: un LRU en memoria con tamaño máximo y, si se configura un directorio,
+# un nivel persistente en disco para que el texto sobreviva reinicios y se comparta entre workers.
+class TextCache:
+    def __init__(self, max_items: int = 512, directory: Optional[str] = None):
+        self.max_items = max_items
+        self.directory = directory
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key_for(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.txt")
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                text = f.read()
+        except FileNotFoundError:
+            return None
+        self._remember(key, text)
+        return text
+
+    def set(self, key: str, text: str) -> None:
+        self._remember(key, text)
+        if self.directory:
+            # Escribimos en un archivo temporal y lo renombramos para que otro worker nunca lea un archivo a medias
+            tmp_path = f"{self._path(key)}.{os.getpid()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, self._path(key))
+
+    def _remember(self, key: str, text: str) -> None:
+        with self._lock:
+            self._items[key] = text
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_items:
+                self._items.popitem(last=False)
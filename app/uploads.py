@@ -0,0 +1,71 @@
+import zipfile
+from typing import Dict
+
+from fastapi import HTTPException, UploadFile
+from starlette.responses import JSONResponse
+
+# Firmas (magic bytes) de los tipos de CV que aceptamos. El DOCX es un zip, así que además
+# se revisa que adentro tenga word/document.xml.
+PDF_MAGIC = b"%PDF-"
+ZIP_MAGIC = b"PK\x03\x04"
+
+
+# Middleware ASGI que corta el body de las rutas de subida de archivos cuando pasa el límite de bytes.
+# Si el Content-Length ya viene más grande se responde 413 sin leer nada; si no viene (chunked) se van
+# contando los bytes a medida que llegan. Starlette guarda cada archivo en un SpooledTemporaryFile
+# (memoria hasta 1 MB y después disco), así que con el límite el body nunca queda entero en memoria.
+class LimitUploadSizeMiddleware:
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope.get("path")) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        for name, value in scope.get("headers", []):
+            if name == b"content-length" and value.isdigit() and int(value) > limit:
+                response = JSONResponse({"detail": f"El archivo supera el límite de {limit} bytes."}, status_code=413)
+                await response(scope, receive, send)
+                return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # FastAPI vuelve a lanzar las HTTPException que salen del parseo del form
+                    raise HTTPException(status_code=413, detail=f"El archivo supera el límite de {limit} bytes.")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+# Revisa tamaño y magic bytes del archivo antes de parsearlo y devuelve la extensión real (".pdf" o ".docx").
+# La extensión del nombre tiene que coincidir con el contenido.
+def validar_archivo_cv(file: UploadFile, max_bytes: int) -> str:
+    if file.size is not None and file.size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"El archivo supera el límite de {max_bytes} bytes.")
+
+    nombre = (file.filename or "").lower()
+    file.file.seek(0)
+    cabecera = file.file.read(len(PDF_MAGIC))
+    file.file.seek(0)
+
+    if nombre.endswith(".pdf") and cabecera.startswith(PDF_MAGIC):
+        return ".pdf"
+    if nombre.endswith(".docx") and cabecera.startswith(ZIP_MAGIC):
+        try:
+            # Solo se lee el directorio central del zip, no se descomprime nada
+            if "word/document.xml" in zipfile.ZipFile(file.file).namelist():
+                return ".docx"
+        except zipfile.BadZipFile:
+            pass
+        finally:
+            file.file.seek(0)
+    raise HTTPException(status_code=400, detail="Solo se aceptan archivos PDF o DOCX.")
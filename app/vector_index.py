@@ -0,0 +1,138 @@
+import fcntl
+import json
+import os
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+
+# Índice de vectores en proceso para los embeddings de los CV ya analizados.
+# Los vectores se guardan normalizados, así la similitud coseno es solo un producto punto.
+# En disco son tres archivos dentro de `directory`:
+#   - embeddings.bin: la matriz (n, dim) en float16 o float32, fila por fila
+#   - ids.bin: el id del análisis de cada fila (int64)
+#   - meta.json: dim, dtype, el encoder que generó los vectores y cuántas filas están completas
+# Si el índice se creó con otro encoder (ej. se cambió ENCODER_BACKEND) no se abre: los vectores de modelos
+# distintos no son comparables entre sí. Hay que borrar el directorio para que se cree uno nuevo.
+# Los archivos se abren con np.memmap, así los workers arrancan sin cargar nada y comparten las páginas
+# del sistema operativo. Agregar vectores es un append al final de los archivos y después se actualiza meta.json.
+class VectorIndex:
+    def __init__(self, directory: str, dim: int, dtype: str = "float16", chunk_rows: int = 65536, encoder: Optional[str] = None):
+        self.directory = directory
+        self.dim = dim
+        self.encoder = encoder
+        self.dtype = np.dtype(dtype)
+        self.chunk_rows = chunk_rows
+        self._lock = threading.Lock()
+        self._count = 0
+        self._vectors = None
+        self._ids = None
+
+        os.makedirs(directory, exist_ok=True)
+        meta = self._read_meta()
+        if meta is None:
+            self._write_meta(0)
+        elif meta["dim"] != dim or meta["dtype"] != self.dtype.name:
+            raise ValueError(
+                f"El índice en {directory} es dim={meta['dim']} dtype={meta['dtype']}, "
+                f"no coincide con dim={dim} dtype={self.dtype.name}"
+            )
+        elif meta.get("encoder") != encoder:
+            raise ValueError(
+                f"El índice en {directory} tiene vectores del encoder {meta.get('encoder')!r}, no de {encoder!r}; "
+                f"borrá el directorio para crear uno nuevo"
+            )
+        self._remap()
+
+    @property
+    def _meta_path(self) -> str:
+        return os.path.join(self.directory, "meta.json")
+
+    @property
+    def _vectors_path(self) -> str:
+        return os.path.join(self.directory, "embeddings.bin")
+
+    @property
+    def _ids_path(self) -> str:
+        return os.path.join(self.directory, "ids.bin")
+
+    def _read_meta(self):
+        try:
+            with open(self._meta_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self, count: int) -> None:
+        tmp_path = f"{self._meta_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"dim": self.dim, "dtype": self.dtype.name, "encoder": self.encoder, "count": count}, f)
+        os.replace(tmp_path, self._meta_path)
+
+    # Vuelve a mapear los archivos si otro worker agregó filas desde la última vez
+    def _remap(self) -> None:
+        count = self._read_meta()["count"]
+        if count == self._count and self._vectors is not None:
+            return
+        if count == 0:
+            self._vectors = np.empty((0, self.dim), dtype=self.dtype)
+            self._ids = np.empty((0,), dtype=np.int64)
+        else:
+            self._vectors = np.memmap(self._vectors_path, dtype=self.dtype, mode="r", shape=(count, self.dim))
+            self._ids = np.memmap(self._ids_path, dtype=np.int64, mode="r", shape=(count,))
+        self._count = count
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._remap()
+            return self._count
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def append(self, ids: List[int], vectors: np.ndarray) -> None:
+        vectors = self._normalize(np.atleast_2d(vectors))
+        if vectors.shape != (len(ids), self.dim):
+            raise ValueError(f"Se esperaban {len(ids)} vectores de dimensión {self.dim}, llegó {vectors.shape}")
+
+        # El flock serializa los appends entre workers; meta.json se actualiza al final,
+        # así un lector nunca ve filas escritas a medias.
+        with self._lock, open(os.path.join(self.directory, ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                count = self._read_meta()["count"]
+                row_bytes = self.dim * self.dtype.itemsize
+                with open(self._vectors_path, "ab") as f:
+                    # Si un append anterior se cortó a la mitad, se descarta lo que quedó después de count
+                    f.truncate(count * row_bytes)
+                    f.write(vectors.astype(self.dtype).tobytes())
+                with open(self._ids_path, "ab") as f:
+                    f.truncate(count * np.dtype(np.int64).itemsize)
+                    f.write(np.asarray(ids, dtype=np.int64).tobytes())
+                self._write_meta(count + len(ids))
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+            self._remap()
+
+    # Top-k por similitud coseno. Se recorre la matriz por bloques para no convertir todo a float32 de una vez.
+    def search(self, query: np.ndarray, k: int = 10) -> List[Tuple[int, float]]:
+        with self._lock:
+            self._remap()
+            vectors, ids = self._vectors, self._ids
+        if len(ids) == 0 or k <= 0:
+            return []
+
+        query = self._normalize(query).reshape(-1)
+        scores = np.empty(len(ids), dtype=np.float32)
+        for start in range(0, len(ids), self.chunk_rows):
+            block = np.asarray(vectors[start:start + self.chunk_rows], dtype=np.float32)
+            scores[start:start + len(block)] = block @ query
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(ids[i]), float(scores[i])) for i in top]
@@ -0,0 +1,116 @@
+import io
+import random
+import zipfile
+from typing import List
+from xml.sax.saxutils import escape
+
+# CV sintéticos para los benchmarks: PDF y DOCX armados a mano (sin reportlab ni python-docx),
+# con texto parecido al de un CV real y la cantidad de páginas que se pida.
+# Con la misma semilla siempre se genera el mismo corpus, así las corridas se pueden comparar.
+
+PUESTOS = ["desarrollador backend", "analista de datos", "contador", "enfermera", "diseñador gráfico", "vendedor", "docente"]
+HABILIDADES = ["python", "fastapi", "postgresql", "excel", "sql", "power bi", "atención al cliente", "photoshop",
+               "auditoría", "docker", "kubernetes", "liderazgo", "comunicación", "inglés avanzado", "spark"]
+EMPRESAS = ["Acme S.A.", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises"]
+
+LINEAS_POR_PAGINA = 45
+
+
+def lineas_de_cv(paginas: int, semilla: int = 0) -> List[str]:
+    rng = random.Random(semilla)
+    puesto = rng.choice(PUESTOS)
+    lineas = [f"Curriculum Vitae - Candidato {semilla}", f"Perfil: {puesto} con {rng.randint(1, 20)} años de experiencia", ""]
+    while len(lineas) < paginas * LINEAS_POR_PAGINA:
+        empresa = rng.choice(EMPRESAS)
+        lineas.append(f"Experiencia: {puesto} en {empresa} durante {rng.randint(1, 8)} años")
+        for _ in range(rng.randint(2, 5)):
+            lineas.append(f"- Trabajé con {', '.join(rng.sample(HABILIDADES, 3))} en proyectos de {rng.choice(PUESTOS)}")
+        lineas.append(f"Habilidades: {', '.join(rng.sample(HABILIDADES, 5))}")
+    return lineas[:paginas * LINEAS_POR_PAGINA]
+
+
+def _texto_pdf(texto: str) -> str:
+    # Helvetica con WinAnsiEncoding: los acentos se escriben en latin-1 como escapes octales
+    salida = []
+    for caracter in texto.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)"):
+        codigo = ord(caracter)
+        salida.append(caracter if codigo < 128 else f"\\{codigo:03o}" if codigo < 256 else "?")
+    return "".join(salida)
+
+
+def generar_pdf(paginas: int, semilla: int = 0) -> bytes:
+    lineas = lineas_de_cv(paginas, semilla)
+    objetos = {1: "<< /Type /Catalog /Pages 2 0 R >>", 3: "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"}
+    kids = []
+    for pagina in range(paginas):
+        contenido = ["BT", "/F1 10 Tf", "12 TL", "50 800 Td"]
+        for linea in lineas[pagina * LINEAS_POR_PAGINA:(pagina + 1) * LINEAS_POR_PAGINA]:
+            contenido.append(f"({_texto_pdf(linea)}) Tj T*")
+        contenido.append("ET")
+        stream = "\n".join(contenido).encode("latin-1")
+        page_id, content_id = 4 + pagina * 2, 5 + pagina * 2
+        kids.append(f"{page_id} 0 R")
+        objetos[page_id] = ("<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+                            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {content_id} 0 R >>")
+        objetos[content_id] = stream
+    objetos[2] = f"<< /Type /Pages /Kids [{' '.join(kids)}] /Count {paginas} >>"
+
+    salida = io.BytesIO()
+    salida.write(b"%PDF-1.4\n")
+    offsets = {}
+    for numero in sorted(objetos):
+        offsets[numero] = salida.tell()
+        cuerpo = objetos[numero]
+        salida.write(f"{numero} 0 obj\n".encode())
+        if isinstance(cuerpo, bytes):
+            salida.write(f"<< /Length {len(cuerpo)} >>\nstream\n".encode() + cuerpo + b"\nendstream")
+        else:
+            salida.write(cuerpo.encode())
+        salida.write(b"\nendobj\n")
+    xref = salida.tell()
+    total = max(objetos) + 1
+    salida.write(f"xref\n0 {total}\n0000000000 65535 f \n".encode())
+    for numero in range(1, total):
+        salida.write(f"{offsets[numero]:010d} 00000 n \n".encode())
+    salida.write(f"trailer\n<< /Size {total} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+    return salida.getvalue()
+
+
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+</Types>"""
+
+_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+
+
+def generar_docx(paginas: int, semilla: int = 0) -> bytes:
+    lineas = lineas_de_cv(paginas, semilla)
+    parrafos = []
+    for numero, linea in enumerate(lineas, start=1):
+        parrafos.append(f"<w:p><w:r><w:t xml:space=\"preserve\">{escape(linea)}</w:t></w:r></w:p>")
+        if numero % LINEAS_POR_PAGINA == 0 and numero < len(lineas):
+            parrafos.append('<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+    documento = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                 '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+                 + "".join(parrafos) + "</w:body></w:document>")
+
+    salida = io.BytesIO()
+    with zipfile.ZipFile(salida, "w", zipfile.ZIP_DEFLATED) as docx:
+        docx.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        docx.writestr("_rels/.rels", _RELS)
+        docx.writestr("word/document.xml", documento)
+    return salida.getvalue()
+
+
+def generar(formato: str, paginas: int, semilla: int = 0) -> bytes:
+    if formato == "pdf":
+        return generar_pdf(paginas, semilla)
+    if formato == "docx":
+        return generar_docx(paginas, semilla)
+    raise ValueError(f"Formato desconocido: {formato}")
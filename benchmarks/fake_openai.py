@@ -0,0 +1,102 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+# Servidor falso de la Responses API de OpenAI para los benchmarks: responde siempre el mismo feedback
+# después de una latencia configurable, así se mide la app sin gastar en OpenAI.
+# La app lo usa apuntando OPENAI_BASE_URL a http://127.0.0.1:<puerto>/v1
+#
+#   python benchmarks/fake_openai.py --port 9100 --latencia-ms 800 --jitter-ms 200 --tasa-429 0.02
+
+app = FastAPI()
+
+config = {"latencia_ms": 800.0, "jitter_ms": 0.0, "tasa_429": 0.0, "fragmentos": 20}
+
+FEEDBACK = (
+    "Fortalezas: experiencia sólida en el área y buen manejo de las herramientas pedidas. "
+    "Áreas de mejora: detallar logros medibles y ordenar la experiencia por relevancia. "
+    "Recomendación: el perfil se ajusta a las funciones del puesto, vale la pena una entrevista."
+)
+
+
+def _respuesta(texto: str) -> dict:
+    return {
+        "id": "resp_fake",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": "gpt-4o-mini",
+        "status": "completed",
+        "output": [{
+            "type": "message",
+            "id": "msg_fake",
+            "role": "assistant",
+            "status": "completed",
+            "content": [{"type": "output_text", "text": texto, "annotations": []}],
+        }],
+        "parallel_tool_calls": False,
+        "tool_choice": "auto",
+        "tools": [],
+        "usage": {"input_tokens": 900, "output_tokens": 250, "total_tokens": 1150,
+                  "input_tokens_details": {"cached_tokens": 0}, "output_tokens_details": {"reasoning_tokens": 0}},
+    }
+
+
+def _evento(tipo: str, numero: int, **datos) -> str:
+    return f"event: {tipo}\ndata: {json.dumps({'type': tipo, 'sequence_number': numero, **datos})}\n\n"
+
+
+async def _latencia() -> None:
+    espera = config["latencia_ms"] + random.uniform(-config["jitter_ms"], config["jitter_ms"])
+    await asyncio.sleep(max(espera, 0) / 1000)
+
+
+@app.post("/v1/responses")
+async def responses(request: Request):
+    body = await request.json()
+    if random.random() < config["tasa_429"]:
+        return JSONResponse(
+            status_code=429,
+            content={"error": {"message": "Rate limit reached (fake)", "type": "requests", "code": "rate_limit_exceeded"}},
+            headers={"retry-after-ms": "200"},
+        )
+
+    if not body.get("stream"):
+        await _latencia()
+        return _respuesta(FEEDBACK)
+
+    # En stream la latencia se reparte: la mitad antes del primer fragmento y el resto entre fragmentos
+    async def eventos():
+        numero = 0
+        yield _evento("response.created", numero, response={**_respuesta(""), "status": "in_progress", "output": []})
+        espera_total = config["latencia_ms"] / 1000
+        await asyncio.sleep(espera_total / 2)
+        palabras = FEEDBACK.split(" ")
+        tamaño = max(1, len(palabras) // config["fragmentos"])
+        for inicio in range(0, len(palabras), tamaño):
+            numero += 1
+            delta = " ".join(palabras[inicio:inicio + tamaño]) + (" " if inicio + tamaño < len(palabras) else "")
+            yield _evento("response.output_text.delta", numero, item_id="msg_fake", output_index=0, content_index=0, delta=delta)
+            await asyncio.sleep(espera_total / 2 / config["fragmentos"])
+        numero += 1
+        yield _evento("response.completed", numero, response=_respuesta(FEEDBACK))
+
+    return StreamingResponse(eventos(), media_type="text/event-stream")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor falso de la Responses API de OpenAI")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latencia-ms", type=float, default=800)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--tasa-429", type=float, default=0, help="fracción de pedidos que responden 429")
+    parser.add_argument("--fragmentos", type=int, default=20, help="cantidad de deltas en modo stream")
+    args = parser.parse_args()
+    config.update(latencia_ms=args.latencia_ms, jitter_ms=args.jitter_ms, tasa_429=args.tasa_429, fragmentos=args.fragmentos)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,229 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from time import perf_counter
+
+import httpx
+import numpy as np
+
+import corpus
+
+# Benchmark de carga de punta a punta, sin gastar en OpenAI:
+#   1. levanta fake_openai.py con la latencia pedida
+#   2. levanta la app (serve_app.py) contra SQLite o Postgres, con auth falsa y datos sembrados
+#   3. manda --requests pedidos por endpoint con --concurrencia pedidos en vuelo
+#   4. imprime (y opcionalmente guarda) un JSON con p50/p95/p99 y requests/s por endpoint
+#
+#   python benchmarks/load_test.py --endpoints analyze,feedbackCandidate --concurrencia 32 --requests 500 \
+#       --latencia-ms 800 --salida resultados/antes.json
+#
+# Cada pedido manda un CV distinto (salvo --mismo-cv), así no se mide el cache de texto ni el de respuestas.
+
+DIR = os.path.dirname(os.path.abspath(__file__))
+BENCH_HEADERS = {"Authorization": "Bearer bench"}
+
+ENDPOINTS = {
+    "analyze": {"path": "/analyze/", "modelo": True, "stream": False},
+    "analyze_stream": {"path": "/analyze/stream/", "modelo": True, "stream": True},
+    "feedbackCandidate": {"path": "/feedbackCandidate/", "modelo": False, "stream": False},
+    "feedbackCandidate_stream": {"path": "/feedbackCandidate/stream/", "modelo": False, "stream": True},
+}
+
+
+def _form(endpoint: str, ids: dict, numero: int) -> dict:
+    if endpoint.startswith("analyze"):
+        return {"job_id": str(ids["job_id"]), "client_id": str(ids["client_id"]), "nombre_del_candidato": f"Candidato {numero}"}
+    return {"profesion": "desarrollador backend"}
+
+
+def _percentiles(valores) -> dict:
+    if not valores:
+        return {}
+    valores = np.asarray(valores) * 1000
+    return {
+        "p50": round(float(np.percentile(valores, 50)), 1),
+        "p95": round(float(np.percentile(valores, 95)), 1),
+        "p99": round(float(np.percentile(valores, 99)), 1),
+        "media": round(float(valores.mean()), 1),
+        "max": round(float(valores.max()), 1),
+    }
+
+
+async def _un_pedido(client: httpx.AsyncClient, endpoint: str, archivo: tuple, form: dict) -> tuple:
+    definicion = ENDPOINTS[endpoint]
+    inicio = perf_counter()
+    if not definicion["stream"]:
+        response = await client.post(definicion["path"], files={"file": archivo}, data=form, headers=BENCH_HEADERS)
+        return response.status_code, perf_counter() - inicio, None
+
+    primer_byte = None
+    async with client.stream("POST", definicion["path"], files={"file": archivo}, data=form, headers=BENCH_HEADERS) as response:
+        async for _ in response.aiter_bytes():
+            if primer_byte is None:
+                primer_byte = perf_counter() - inicio
+    return response.status_code, perf_counter() - inicio, primer_byte
+
+
+async def correr_endpoint(base_url: str, endpoint: str, ids: dict, archivos: list, requests: int, concurrencia: int, warmup: int) -> dict:
+    limites = httpx.Limits(max_connections=concurrencia, max_keepalive_connections=concurrencia)
+    async with httpx.AsyncClient(base_url=base_url, timeout=300, limits=limites) as client:
+        for numero in range(warmup):
+            await _un_pedido(client, endpoint, archivos[numero % len(archivos)], _form(endpoint, ids, numero))
+
+        latencias, primeros_bytes, estados = [], [], Counter()
+        pendientes = iter(range(requests))
+
+        async def worker():
+            for numero in pendientes:
+                archivo = archivos[(warmup + numero) % len(archivos)]
+                try:
+                    status, latencia, primer_byte = await _un_pedido(client, endpoint, archivo, _form(endpoint, ids, numero))
+                except httpx.HTTPError as e:
+                    estados[type(e).__name__] += 1
+                    continue
+                estados[str(status)] += 1
+                if 200 <= status < 300:
+                    latencias.append(latencia)
+                    if primer_byte is not None:
+                        primeros_bytes.append(primer_byte)
+
+        inicio = perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrencia)))
+        duracion = perf_counter() - inicio
+
+    resultado = {
+        "requests": requests,
+        "ok": len(latencias),
+        "errores": requests - len(latencias),
+        "estados": dict(estados),
+        "duracion_s": round(duracion, 2),
+        "rps": round(len(latencias) / duracion, 2) if duracion else 0,
+        "latencia_ms": _percentiles(latencias),
+    }
+    if primeros_bytes:
+        resultado["primer_byte_ms"] = _percentiles(primeros_bytes)
+    return resultado
+
+
+def esperar(url: str, timeout: float, proceso: subprocess.Popen, estado_ok=(200,)) -> None:
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            raise SystemExit(f"El proceso terminó antes de estar listo (código {proceso.returncode})")
+        try:
+            if httpx.get(url, timeout=2).status_code in estado_ok:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.5)
+    raise SystemExit(f"{url} no respondió a tiempo")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de carga de /analyze/ y /feedbackCandidate/ con OpenAI falso")
+    parser.add_argument("--endpoints", default="analyze,feedbackCandidate", help=f"separados por coma: {', '.join(ENDPOINTS)}")
+    parser.add_argument("--concurrencia", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="pedidos medidos por endpoint")
+    parser.add_argument("--warmup", type=int, default=5, help="pedidos de calentamiento por endpoint (no se miden)")
+    parser.add_argument("--db-url", default=None, help="por defecto un SQLite nuevo en un directorio temporal")
+    parser.add_argument("--latencia-ms", type=float, default=800, help="latencia del OpenAI falso")
+    parser.add_argument("--jitter-ms", type=float, default=100)
+    parser.add_argument("--tasa-429", type=float, default=0)
+    parser.add_argument("--formato", choices=["pdf", "docx"], default="pdf")
+    parser.add_argument("--paginas", type=int, default=2)
+    parser.add_argument("--mismo-cv", action="store_true", help="mandar siempre el mismo CV (mide los caches)")
+    parser.add_argument("--app-port", type=int, default=8100)
+    parser.add_argument("--fake-port", type=int, default=9100)
+    parser.add_argument("--ready-timeout", type=float, default=300, help="segundos para que cargue el modelo")
+    parser.add_argument("--salida", default=None, help="archivo JSON donde guardar el resultado")
+    args = parser.parse_args()
+
+    endpoints = [endpoint.strip() for endpoint in args.endpoints.split(",") if endpoint.strip()]
+    desconocidos = [endpoint for endpoint in endpoints if endpoint not in ENDPOINTS]
+    if desconocidos:
+        raise SystemExit(f"Endpoints desconocidos: {', '.join(desconocidos)}")
+
+    tmp = tempfile.mkdtemp(prefix="skinner-bench-")
+    ids_file = os.path.join(tmp, "ids.json")
+    env = dict(os.environ)
+    env.update(
+        DATABASE_URL=args.db_url or f"sqlite:///{os.path.join(tmp, 'bench.db')}",
+        OPENAI_BASE_URL=f"http://127.0.0.1:{args.fake_port}/v1",
+        OPENAI_API_KEY="bench",
+    )
+    # Los límites del tier de OpenAI no aplican al servidor falso, salvo que se pidan explícitamente
+    env.setdefault("LLM_REQUESTS_PER_MINUTE", "0")
+    env.setdefault("LLM_TOKENS_PER_MINUTE", "0")
+
+    procesos = []
+    try:
+        fake = subprocess.Popen([
+            sys.executable, os.path.join(DIR, "fake_openai.py"), "--port", str(args.fake_port),
+            "--latencia-ms", str(args.latencia_ms), "--jitter-ms", str(args.jitter_ms), "--tasa-429", str(args.tasa_429),
+        ])
+        procesos.append(fake)
+        app = subprocess.Popen([
+            sys.executable, os.path.join(DIR, "serve_app.py"), "--port", str(args.app_port), "--ids-file", ids_file,
+        ], env=env)
+        procesos.append(app)
+
+        base_url = f"http://127.0.0.1:{args.app_port}"
+        esperar(f"http://127.0.0.1:{args.fake_port}/docs", 30, fake)
+        esperar(f"{base_url}/", 120, app)
+        if any(ENDPOINTS[endpoint]["modelo"] for endpoint in endpoints):
+            esperar(f"{base_url}/ready", args.ready_timeout, app)
+        with open(ids_file) as f:
+            ids = json.load(f)
+
+        cantidad = 1 if args.mismo_cv else args.requests + args.warmup
+        tipo = "application/pdf" if args.formato == "pdf" else "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+        resultados = {}
+        for indice, endpoint in enumerate(endpoints):
+            # Cada endpoint usa CV propios, así el segundo no encuentra en el cache lo que mandó el primero
+            semillas = range(indice * cantidad, (indice + 1) * cantidad)
+            archivos = [(f"cv_{semilla}.{args.formato}", corpus.generar(args.formato, args.paginas, semilla), tipo) for semilla in semillas]
+            resultados[endpoint] = asyncio.run(correr_endpoint(base_url, endpoint, ids, archivos, args.requests, args.concurrencia, args.warmup))
+            print(f"{endpoint}: {resultados[endpoint]['rps']} req/s, p95 {resultados[endpoint]['latencia_ms'].get('p95')} ms", file=sys.stderr)
+    finally:
+        for proceso in procesos:
+            proceso.terminate()
+        for proceso in procesos:
+            try:
+                proceso.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proceso.kill()
+
+    reporte = {
+        "fecha": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "concurrencia": args.concurrencia,
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "db": "postgresql" if env["DATABASE_URL"].startswith("postgres") else "sqlite",
+            "latencia_openai_ms": args.latencia_ms,
+            "jitter_openai_ms": args.jitter_ms,
+            "tasa_429": args.tasa_429,
+            "formato": args.formato,
+            "paginas": args.paginas,
+            "mismo_cv": args.mismo_cv,
+        },
+        "resultados": resultados,
+    }
+    salida = json.dumps(reporte, indent=2, ensure_ascii=False)
+    print(salida)
+    if args.salida:
+        os.makedirs(os.path.dirname(os.path.abspath(args.salida)), exist_ok=True)
+        with open(args.salida, "w") as f:
+            f.write(salida)
+
+
+if __name__ == "__main__":
+    main()
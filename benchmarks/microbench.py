@@ -0,0 +1,186 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+from datetime import datetime, timezone
+from time import perf_counter
+
+import numpy as np
+
+import corpus
+
+# Microbenchmarks de las funciones que más CPU usan: extract_text_from_bytes, extract_experience y match_resume_to_job_sync,
+# sobre un corpus sintético de PDF y DOCX con distinta cantidad de páginas (siempre el mismo, generado con semillas fijas).
+# Cada función corre en su propio proceso, así el pico de RSS es solo de esa función.
+#
+#   python benchmarks/microbench.py --salida resultados/base.json
+#   python benchmarks/microbench.py --comparar resultados/base.json --tolerancia 1.15
+#
+# Con --comparar sale con código 1 si algún caso quedó más lento que base * tolerancia (p50 por documento).
+
+DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(DIR, "..", "app")
+FUNCIONES = ("extract_text_from_bytes", "extract_experience", "match_resume_to_job_sync")
+FUNCIONES_DEL_TRABAJO = "desarrollar y mantener apis rest, diseñar bases de datos relacionales, revisar código del equipo"
+
+
+def _rss_mb() -> float:
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(maximo / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _importar_app():
+    # main.py necesita estas variables para importarse; el benchmark no usa ni la base ni OpenAI
+    os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.gettempdir(), 'skinner-microbench.db')}")
+    os.environ.setdefault("OPENAI_API_KEY", "microbench")
+    sys.path.insert(0, APP_DIR)
+    import main
+    return main
+
+
+def _medir(fn, entradas: list, repeticiones: int) -> list:
+    latencias = []
+    for _ in range(repeticiones):
+        for entrada in entradas:
+            inicio = perf_counter()
+            fn(*entrada)
+            latencias.append(perf_counter() - inicio)
+    return latencias
+
+
+def _resumen(latencias: list, documentos: int, paginas: int) -> dict:
+    valores = np.asarray(latencias)
+    total = float(valores.sum())
+    return {
+        "documentos": documentos,
+        "mediciones": len(latencias),
+        "p50_ms": round(float(np.percentile(valores, 50)) * 1000, 3),
+        "p95_ms": round(float(np.percentile(valores, 95)) * 1000, 3),
+        "media_ms": round(float(valores.mean()) * 1000, 3),
+        "docs_por_s": round(len(latencias) / total, 2) if total else None,
+        "paginas_por_s": round(len(latencias) * paginas / total, 2) if total else None,
+    }
+
+
+# Corre una sola función sobre todos los casos (se llama en un proceso aparte)
+def correr_funcion(funcion: str, formatos: list, paginas: list, documentos: int, repeticiones: int) -> dict:
+    main = _importar_app()
+    from extraction import extract_text_from_bytes
+
+    if funcion == "match_resume_to_job_sync":
+        from encoder import cargar_encoder
+        main.model = cargar_encoder(main.MODEL_NAME, main.ENCODER_BACKEND, main.ENCODER_ONNX_FILE, main.ENCODER_EXPORT_DIR)
+        main.match_resume_to_job_sync("calentando el modelo", FUNCIONES_DEL_TRABAJO)
+
+    # El corpus se genera y se extrae antes de tomar el RSS base, así el pico refleja solo la función medida
+    casos = {}
+    for formato in formatos:
+        for cantidad in paginas:
+            archivos = [(corpus.generar(formato, cantidad, semilla), f"cv_{semilla}.{formato}") for semilla in range(documentos)]
+            casos[f"{formato}_{cantidad}p"] = (cantidad, archivos, [extract_text_from_bytes(*archivo) for archivo in archivos])
+
+    rss_base = _rss_mb()
+    resultados = {}
+    for nombre, (cantidad, archivos, textos) in casos.items():
+        if funcion == "extract_text_from_bytes":
+            # Solo el parseo del PDF/DOCX, sin el cache ni el pool de procesos
+            latencias = _medir(extract_text_from_bytes, archivos, repeticiones)
+        elif funcion == "extract_experience":
+            latencias = _medir(main.extract_experience, [(texto,) for texto in textos], repeticiones)
+        else:
+            latencias = _medir(main.match_resume_to_job_sync, [(texto, FUNCIONES_DEL_TRABAJO) for texto in textos], repeticiones)
+        resultados[nombre] = _resumen(latencias, documentos, cantidad)
+
+    return {"rss_base_mb": rss_base, "rss_pico_mb": _rss_mb(), "casos": resultados}
+
+
+def comparar(actual: dict, base: dict, tolerancia: float) -> list:
+    regresiones = []
+    for funcion, resultado in actual["resultados"].items():
+        casos_base = base.get("resultados", {}).get(funcion, {}).get("casos", {})
+        for caso, medicion in resultado.get("casos", {}).items():
+            anterior = casos_base.get(caso)
+            if not anterior:
+                continue
+            ratio = medicion["p50_ms"] / anterior["p50_ms"] if anterior["p50_ms"] else 1.0
+            medicion["vs_base"] = round(ratio, 3)
+            if ratio > tolerancia:
+                regresiones.append(f"{funcion} {caso}: p50 {anterior['p50_ms']} ms -> {medicion['p50_ms']} ms (x{ratio:.2f})")
+    return regresiones
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Microbenchmarks de extracción de texto y match sobre CV sintéticos")
+    parser.add_argument("--funciones", default=",".join(FUNCIONES))
+    parser.add_argument("--formatos", default="pdf,docx")
+    parser.add_argument("--paginas", default="1,2,5,10", help="cantidades de páginas separadas por coma")
+    parser.add_argument("--documentos", type=int, default=10, help="documentos distintos por caso")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--salida", default=None, help="archivo JSON donde guardar el resultado")
+    parser.add_argument("--comparar", default=None, help="JSON de una corrida anterior para detectar regresiones")
+    parser.add_argument("--tolerancia", type=float, default=1.15, help="cuánto más lento que la base se acepta")
+    parser.add_argument("--solo", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--resultado", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    formatos = [formato.strip() for formato in args.formatos.split(",") if formato.strip()]
+    paginas = [int(cantidad) for cantidad in args.paginas.split(",") if cantidad.strip()]
+
+    if args.solo:
+        # El resultado va a un archivo y no a stdout: al importar main el proceso también escribe sus logs en stdout
+        resultado = correr_funcion(args.solo, formatos, paginas, args.documentos, args.repeticiones)
+        with open(args.resultado, "w") as f:
+            json.dump(resultado, f)
+        return
+
+    resultados = {}
+    for funcion in [funcion.strip() for funcion in args.funciones.split(",") if funcion.strip()]:
+        if funcion not in FUNCIONES:
+            raise SystemExit(f"Función desconocida: {funcion}")
+        with tempfile.TemporaryDirectory(prefix="microbench-") as directorio:
+            archivo_resultado = os.path.join(directorio, f"{funcion}.json")
+            proceso = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--solo", funcion, "--resultado", archivo_resultado,
+                 "--formatos", ",".join(formatos), "--paginas", ",".join(map(str, paginas)),
+                 "--documentos", str(args.documentos), "--repeticiones", str(args.repeticiones)],
+                capture_output=True, text=True,
+            )
+            if proceso.returncode != 0:
+                resultados[funcion] = {"error": proceso.stderr.strip().splitlines()[-1] if proceso.stderr.strip() else f"código {proceso.returncode}"}
+            else:
+                with open(archivo_resultado) as f:
+                    resultados[funcion] = json.load(f)
+        print(f"{funcion}: listo", file=sys.stderr)
+
+    reporte = {
+        "fecha": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "config": {"formatos": formatos, "paginas": paginas, "documentos": args.documentos, "repeticiones": args.repeticiones},
+        "resultados": resultados,
+    }
+    regresiones = []
+    if args.comparar:
+        with open(args.comparar) as f:
+            regresiones = comparar(reporte, json.load(f), args.tolerancia)
+        reporte["regresiones"] = regresiones
+
+    salida = json.dumps(reporte, indent=2, ensure_ascii=False)
+    print(salida)
+    if args.salida:
+        os.makedirs(os.path.dirname(os.path.abspath(args.salida)), exist_ok=True)
+        with open(args.salida, "w") as f:
+            f.write(salida)
+    if regresiones:
+        print("\n".join(["Regresiones:"] + regresiones), file=sys.stderr)
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
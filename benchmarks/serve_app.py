@@ -0,0 +1,79 @@
+import argparse
+import json
+import os
+import sys
+from datetime import date
+
+# Levanta la app para el benchmark de carga (la lanza load_test.py, no hace falta correrlo a mano):
+#   - la auth de Clerk se reemplaza: el token BENCH_TOKEN es siempre el usuario BENCH_USER
+#   - crea las tablas si no existen y siembra un cliente, un trabajo y un candidato sin límite de uso
+#   - con SQLite, la columna tsvector se guarda como texto (solo Postgres tiene búsqueda de texto completo)
+# DATABASE_URL y OPENAI_BASE_URL vienen del entorno.
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+sys.path.insert(0, APP_DIR)
+
+BENCH_TOKEN = "bench"
+BENCH_USER = "bench-user"
+
+
+def sembrar(SessionLocal, Base, engine) -> dict:
+    from sqlalchemy import text
+    from database import Candidate, Client, Function, Job, Nivel, Profile, Skill, Usage
+
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    Base.metadata.create_all(bind=engine)
+
+    db = SessionLocal()
+    try:
+        client = db.query(Client).filter(Client.name == "Benchmark").first()
+        if not client:
+            client = Client(name="Benchmark")
+            job = Job(title="Desarrollador backend", client=client)
+            db.add_all([client, job])
+            db.flush()
+            for funcion in ["desarrollar y mantener apis rest", "diseñar bases de datos relacionales", "revisar código del equipo"]:
+                db.add(Function(title=funcion, job_id=job.id))
+            for habilidad in ["python", "fastapi", "postgresql", "docker"]:
+                db.add(Skill(name=habilidad, job_id=job.id))
+            db.add(Profile(name="desarrollador con 3 años de experiencia en python", job_id=job.id))
+
+            nivel = Nivel(name="Senior")
+            db.add(nivel)
+            db.flush()
+            candidato = Candidate(external_user_id=BENCH_USER, firstname="Bench", lastname="Mark",
+                                  birthday=date(1990, 1, 1), country="AR", nivel_id=nivel.id)
+            db.add(candidato)
+            db.flush()
+            db.add(Usage(user_id=candidato.id, usage_count=0, usage_limit=10 ** 9))
+            db.commit()
+        job = db.query(Job).filter(Job.client_id == client.id).first()
+        return {"client_id": client.id, "job_id": job.id}
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="App con auth falsa y datos sembrados para el benchmark de carga")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--ids-file", required=True, help="dónde escribir client_id y job_id sembrados")
+    args = parser.parse_args()
+
+    import database
+    if database.engine.dialect.name == "sqlite":
+        from sqlite_local import preparar_sqlite
+        preparar_sqlite([database.engine, database.async_engine.sync_engine])
+    ids = sembrar(database.SessionLocal, database.Base, database.engine)
+
+    import auth
+    auth.verify_session_token = lambda token: {"sub": BENCH_USER} if token == BENCH_TOKEN else None
+
+    import main
+    import uvicorn
+
+    with open(args.ids_file, "w") as f:
+        json.dump(ids, f)
+    uvicorn.run(main.app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,46 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Los tests importan los módulos de app/ igual que la app (imports planos) y corren contra un SQLite
+# temporal; nunca contra la base ni la API de OpenAI configuradas en el entorno.
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "app")
+sys.path.insert(0, APP_DIR)
+
+_TMP = tempfile.mkdtemp(prefix="skinner-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP, 'tests.db')}"
+os.environ["OPENAI_API_KEY"] = "test"
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def tablas():
+    import database
+    from sqlite_local import preparar_sqlite
+    preparar_sqlite([database.engine, database.async_engine.sync_engine])
+    database.Base.metadata.create_all(bind=database.engine)
+    yield database
+    database.Base.metadata.drop_all(bind=database.engine)
+
+
+@pytest.fixture
+def db(tablas):
+    session = tablas.SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+# Para los tests async: al terminar cierra las conexiones del engine async en el mismo event loop
+# (si no, el thread de aiosqlite de cada conexión queda vivo y el proceso no termina)
+@pytest.fixture
+async def async_engine(tablas):
+    yield tablas.async_engine
+    await tablas.async_engine.dispose()
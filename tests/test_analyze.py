@@ -0,0 +1,66 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def trabajo(db, monkeypatch):
+    import auth
+    import main
+    from database import Client, Job
+
+    cliente = Client(name=f"Cliente {uuid.uuid4().hex}")
+    db.add(cliente)
+    db.flush()
+    job = Job(title="Backend", client_id=cliente.id)
+    db.add(job)
+    db.commit()
+
+    async def extraer(file):
+        return "desarrollador python"
+
+    async def feedback(*args):
+        return {"feedback": "bien"}
+
+    monkeypatch.setattr(main, "extract_text_async", extraer)
+    monkeypatch.setattr(main, "generate_gpt_feedback_async", feedback)
+    monkeypatch.setattr(auth, "verify_session_token", lambda token: {"sub": "test"} if token == "test" else None)
+    main.app.dependency_overrides[main.require_model] = lambda: None
+    yield {"job_id": job.id, "client_id": cliente.id}
+    main.app.dependency_overrides.clear()
+
+
+async def _match_roto(*args):
+    raise RuntimeError("se cayó la base")
+
+
+def test_error_en_el_task_group_se_relanza_con_su_causa(trabajo, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "match_resume_to_job_embedding_async", _match_roto)
+    with TestClient(main.app, headers={"Authorization": "Bearer test"}) as client:
+        with pytest.raises(RuntimeError, match="se cayó la base"):
+            client.post("/analyze/", files={"file": ("cv.pdf", b"%PDF-1.4 cv", "application/pdf")},
+                        data={**trabajo, "nombre_del_candidato": "Ana"})
+
+
+@pytest.mark.anyio
+async def test_tarea_fallida_guarda_la_causa(trabajo, async_engine, monkeypatch):
+    import main
+    from database import AsyncSessionLocal
+
+    async def actualizar_etapa(db, tarea, etapa):
+        pass
+
+    async def extraer(data, file_name, extension):
+        return "desarrollador python"
+
+    monkeypatch.setattr(main, "match_resume_to_job_embedding_async", _match_roto)
+    monkeypatch.setattr(main, "actualizar_etapa", actualizar_etapa)
+    monkeypatch.setattr(main, "extraer_texto_de_bytes_async", extraer)
+    tarea = SimpleNamespace(file_name="cv.pdf", file_data=b"%PDF-1.4 cv", nombre_del_candidato="Ana", **trabajo)
+    async with AsyncSessionLocal() as db:
+        with pytest.raises(RuntimeError, match="se cayó la base"):
+            await main.procesar_tarea_de_analisis(db, tarea)
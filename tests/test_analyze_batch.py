@@ -0,0 +1,92 @@
+import asyncio
+import uuid
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def cliente(db, monkeypatch):
+    import auth
+    import main
+    from database import Client, Job
+
+    cliente = Client(name=f"Cliente {uuid.uuid4().hex}")
+    db.add(cliente)
+    db.flush()
+    job = Job(title="Backend lote", client_id=cliente.id)
+    db.add(job)
+    db.commit()
+
+    async def match(db, job_id, resume_texts, funciones, perfil):
+        return [0.5] * len(resume_texts), np.zeros((len(resume_texts), 4), dtype=np.float32)
+
+    monkeypatch.setattr(main, "match_resumes_to_job_batch_async", match)
+    monkeypatch.setattr(auth, "verify_session_token", lambda token: {"sub": "test"} if token == "test" else None)
+    main.app.dependency_overrides[main.require_model] = lambda: None
+    with TestClient(main.app, headers={"Authorization": "Bearer test"}) as client:
+        client.ids = {"job_id": job.id, "client_id": cliente.id}
+        yield client
+    main.app.dependency_overrides.clear()
+
+
+def _archivos(cantidad: int) -> list:
+    return [("files", (f"cv_{numero}.pdf", b"%PDF-1.4 cv", "application/pdf")) for numero in range(cantidad)]
+
+
+def test_lee_y_extrae_a_lo_sumo_max_concurrency_archivos(cliente, monkeypatch):
+    import main
+
+    en_curso, maximo = 0, 0
+
+    async def extraer(file):
+        nonlocal en_curso, maximo
+        en_curso += 1
+        maximo = max(maximo, en_curso)
+        await file.read()
+        await asyncio.sleep(0.01)
+        en_curso -= 1
+        return "desarrollador python"
+
+    async def feedback(*args):
+        return {"feedback": "bien"}
+
+    monkeypatch.setattr(main, "extract_text_async", extraer)
+    monkeypatch.setattr(main, "generate_gpt_feedback_async", feedback)
+    monkeypatch.setattr(main.extraction_pool, "max_concurrency", 2)
+
+    response = cliente.post("/analyze/batch/", files=_archivos(10), data=cliente.ids)
+    assert response.status_code == 200
+    assert len(response.json()["resultados"]) == 10
+    assert maximo == 2
+
+
+def test_resultados_en_orden_y_sin_feedback_de_relleno(cliente, db, monkeypatch):
+    import main
+    from database import Analize
+
+    async def extraer(file):
+        if file.filename == "cv_1.pdf":
+            return "   "
+        return f"desarrollador {file.filename}"
+
+    async def feedback(resume_text, *args):
+        if "cv_2" in resume_text:
+            raise RuntimeError("GPT no respondió")
+        return {"feedback": f"feedback de {resume_text}"}
+
+    monkeypatch.setattr(main, "extract_text_async", extraer)
+    monkeypatch.setattr(main, "generate_gpt_feedback_async", feedback)
+
+    response = cliente.post("/analyze/batch/", files=_archivos(4), data=cliente.ids)
+    assert response.status_code == 200
+    resultados = response.json()["resultados"]
+    assert [resultado["file_name"] for resultado in resultados] == ["cv_0.pdf", "cv_1.pdf", "cv_2.pdf", "cv_3.pdf"]
+    assert "error" in resultados[1]
+    assert resultados[0]["feedback"] == {"feedback": "feedback de desarrollador cv_0.pdf"}
+    assert resultados[2]["feedback"] is None and resultados[2]["feedback_error"]
+
+    db.expire_all()
+    assert db.get(Analize, resultados[2]["id"]).feedback is None
+    assert db.get(Analize, resultados[3]["id"]).feedback == "feedback de desarrollador cv_3.pdf"
@@ -0,0 +1,143 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+ISSUER = "https://clerk.skinner.test"
+ORIGEN = "http://localhost:3000"
+
+
+def _llave(kid: str) -> tuple:
+    privada = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(privada.public_key()))
+    jwk.update(kid=kid, use="sig", alg="RS256")
+    return privada, jwk
+
+
+# JWKS local en lugar del de Clerk: sirve las llaves de `publicadas` y cuenta cuántas veces se pidió
+class JwksLocal:
+    def __init__(self):
+        self.publicadas = []
+        self.pedidos = 0
+        jwks = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                jwks.pedidos += 1
+                body = json.dumps({"keys": jwks.publicadas}).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = HTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/v1/jwks"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def jwks(monkeypatch):
+    import auth
+
+    servidor = JwksLocal()
+    monkeypatch.setattr(auth, "jwks_cache", auth.JwksCache(servidor.url, None, min_refresh_seconds=30))
+    monkeypatch.setattr(auth, "token_cache", auth.VerifiedTokenCache(60))
+    monkeypatch.setattr(auth, "CLERK_ISSUER", ISSUER)
+    yield servidor
+    servidor.close()
+
+
+def _token(privada, kid: str, **claims) -> str:
+    ahora = int(time.time())
+    payload = {"sub": "user_123", "iss": ISSUER, "azp": ORIGEN, "iat": ahora, "nbf": ahora, "exp": ahora + 60}
+    payload.update(claims)
+    return jwt.encode(payload, privada, algorithm="RS256", headers={"kid": kid})
+
+
+def test_token_valido(jwks):
+    import auth
+
+    privada, jwk = _llave("kid-1")
+    jwks.publicadas = [jwk]
+
+    payload = auth.verify_session_token(_token(privada, "kid-1"))
+    assert payload["sub"] == "user_123"
+    assert jwks.pedidos == 1
+
+
+def test_primer_pedido_con_reloj_monotonico_recien_arrancado(jwks, monkeypatch):
+    import auth
+
+    privada, jwk = _llave("kid-1")
+    jwks.publicadas = [jwk]
+    monkeypatch.setattr(auth.time, "monotonic", lambda: 1.0)
+
+    assert auth.verify_session_token(_token(privada, "kid-1")) is not None
+    assert jwks.pedidos == 1
+
+
+def test_token_vencido(jwks):
+    import auth
+
+    privada, jwk = _llave("kid-1")
+    jwks.publicadas = [jwk]
+    ahora = int(time.time())
+
+    assert auth.verify_session_token(_token(privada, "kid-1", iat=ahora - 600, nbf=ahora - 600, exp=ahora - 300)) is None
+
+
+@pytest.mark.parametrize("claims", [{"azp": "https://otro-sitio.com"}, {"iss": "https://clerk.otro.test"}])
+def test_azp_o_issuer_incorrecto(jwks, claims):
+    import auth
+
+    privada, jwk = _llave("kid-1")
+    jwks.publicadas = [jwk]
+
+    assert auth.verify_session_token(_token(privada, "kid-1", **claims)) is None
+
+
+def test_firma_de_otra_llave(jwks):
+    import auth
+
+    _, jwk = _llave("kid-1")
+    otra, _ = _llave("kid-1")
+    jwks.publicadas = [jwk]
+
+    assert auth.verify_session_token(_token(otra, "kid-1")) is None
+
+
+def test_kid_desconocido_refresca_una_sola_vez(jwks, monkeypatch):
+    import auth
+
+    reloj = [1000.0]
+    monkeypatch.setattr(auth.time, "monotonic", lambda: reloj[0])
+    privada_1, jwk_1 = _llave("kid-1")
+    jwks.publicadas = [jwk_1]
+    assert auth.verify_session_token(_token(privada_1, "kid-1")) is not None
+    assert jwks.pedidos == 1
+
+    # Clerk rotó las llaves: pasado min_refresh_seconds, el kid nuevo dispara un solo refresco y el token se verifica
+    reloj[0] += 31
+    privada_2, jwk_2 = _llave("kid-2")
+    jwks.publicadas = [jwk_1, jwk_2]
+    assert auth.verify_session_token(_token(privada_2, "kid-2")) is not None
+    assert auth.verify_session_token(_token(privada_2, "kid-2", sub="user_456")) is not None
+    assert jwks.pedidos == 2
+
+    # Un kid inventado dentro de min_refresh_seconds no vuelve a pedir el JWKS
+    privada_3, _ = _llave("kid-3")
+    assert auth.verify_session_token(_token(privada_3, "kid-3")) is None
+    assert auth.verify_session_token(_token(privada_3, "kid-3", sub="otro")) is None
+    assert jwks.pedidos == 2
@@ -0,0 +1,40 @@
+import asyncio
+import uuid
+
+import numpy as np
+import pytest
+
+
+@pytest.fixture
+def trabajo(db):
+    from database import Client, Job
+
+    cliente = Client(name=f"Cliente {uuid.uuid4().hex}")
+    db.add(cliente)
+    db.flush()
+    job = Job(title="Backend", client_id=cliente.id)
+    db.add(job)
+    db.commit()
+    return job.id
+
+
+@pytest.mark.anyio
+async def test_analisis_concurrentes_de_un_trabajo_sin_embedding(db, trabajo, async_engine, monkeypatch):
+    import main
+    from database import AsyncSessionLocal, JobEmbedding
+
+    # Todos leen la base antes de que alguno guarde: el encode tarda y cede el loop
+    async def encode(textos):
+        await asyncio.sleep(0.05)
+        return np.ones((len(textos), 4), dtype=np.float32)
+
+    monkeypatch.setattr(main.embedding_service, "encode", encode)
+    monkeypatch.setattr(main, "job_embeddings", {})
+
+    async def analizar():
+        async with AsyncSessionLocal() as session:
+            return await main.obtener_embedding_del_trabajo(session, trabajo, "desarrollar apis", "3 años")
+
+    embeddings = await asyncio.gather(*(analizar() for _ in range(8)))
+    assert all(np.array_equal(embedding, np.ones(4, dtype=np.float32)) for embedding in embeddings)
+    assert db.query(JobEmbedding).filter(JobEmbedding.job_id == trabajo).count() == 1
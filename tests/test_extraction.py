@@ -0,0 +1,82 @@
+import asyncio
+import io
+import os
+import signal
+import zipfile
+
+import pytest
+
+
+def _docx(texto: str) -> bytes:
+    salida = io.BytesIO()
+    with zipfile.ZipFile(salida, "w") as docx:
+        docx.writestr("[Content_Types].xml", '<?xml version="1.0"?><Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types"/>')
+        docx.writestr("word/document.xml", '<?xml version="1.0"?><w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+                                           f"<w:body><w:p><w:r><w:t>{texto}</w:t></w:r></w:p></w:body></w:document>")
+    return salida.getvalue()
+
+
+@pytest.fixture
+def pool():
+    from extraction import ExtractionPool
+    pool = ExtractionPool(workers=1, max_concurrency=1, timeout_seconds=30)
+    yield pool
+    pool.shutdown()
+
+
+@pytest.mark.anyio
+async def test_pdf_corrupto_es_archivo_ilegible(pool):
+    from extraction import ArchivoIlegible
+
+    with pytest.raises(ArchivoIlegible):
+        await pool.extract(b"%PDF-1.4\nesto no es un pdf de verdad", "cv.pdf")
+    assert await pool.extract(_docx("Python"), "cv.docx") == "python"
+
+
+@pytest.mark.anyio
+async def test_worker_muerto_se_reemplaza(pool):
+    assert await pool.extract(_docx("Antes"), "cv.docx") == "antes"
+    for proceso in list(pool._pool._processes.values()):
+        os.kill(proceso.pid, signal.SIGKILL)
+
+    assert await pool.extract(_docx("Despues"), "cv.docx") == "despues"
+
+
+def _docx_lento() -> bytes:
+    # Un DOCX enorme que tarda bastante más que el timeout de los tests en parsearse
+    return _docx("</w:t></w:r></w:p><w:p><w:r><w:t>palabra " * 400000)
+
+
+@pytest.mark.anyio
+async def test_timeout_recicla_el_pool_y_no_cuenta_la_espera(pool):
+    from extraction import ExtractionTimeout
+
+    await pool.extract(_docx("Calentando"), "cv.docx")
+    ocupado = pool._pool
+    # El DOCX enorme ocupa el único lugar más que el timeout y se recicla el pool; el que esperaba el
+    # semáforo no recibe ExtractionTimeout por la espera y se parsea en el pool nuevo
+    pool.timeout_seconds = 0.3
+    resultados = await asyncio.gather(
+        pool.extract(_docx_lento(), "lento.docx"),
+        pool.extract(_docx("Dos"), "cv.docx"),
+        return_exceptions=True,
+    )
+    assert isinstance(resultados[0], ExtractionTimeout)
+    assert resultados[1] == "dos"
+    assert pool._pool is not ocupado
+
+
+@pytest.mark.anyio
+async def test_lote_en_fila_no_da_timeout():
+    from extraction import ExtractionPool
+
+    # Más documentos que lugares: la fila entera (~0.25 s por documento) tarda bastante más que el timeout,
+    # pero ninguno se pasa parseándose
+    pool = ExtractionPool(workers=1, max_concurrency=4, timeout_seconds=1.5)
+    try:
+        assert pool.max_concurrency == 1
+        documento = _docx("palabra " + "</w:t></w:r></w:p><w:p><w:r><w:t>palabra " * 20000)
+        textos = await asyncio.gather(*(pool.extract(documento, "cv.docx") for _ in range(12)))
+        assert len(textos) == 12 and all(texto.startswith("palabra") for texto in textos)
+    finally:
+        pool.shutdown()
@@ -0,0 +1,96 @@
+import uuid
+from datetime import date
+from types import SimpleNamespace
+
+import anyio
+import httpx
+import pytest
+
+
+@pytest.fixture
+def candidato(db, monkeypatch):
+    import auth
+    from database import Candidate, Nivel, Usage
+
+    external_id = f"user-{uuid.uuid4().hex}"
+    nivel = Nivel(name="Junior")
+    db.add(nivel)
+    db.flush()
+    perfil = Candidate(external_user_id=external_id, firstname="Ana", lastname="Pérez",
+                       birthday=date(1995, 5, 5), country="AR", nivel_id=nivel.id)
+    db.add(perfil)
+    db.flush()
+    db.add(Usage(user_id=perfil.id, usage_count=0, usage_limit=5))
+    db.commit()
+
+    monkeypatch.setattr(auth, "verify_session_token", lambda token: {"sub": external_id} if token == "test" else None)
+    return perfil.id
+
+
+def _usage_count(db, perfil_id: int) -> int:
+    from database import Usage
+    db.expire_all()
+    return db.query(Usage).filter(Usage.user_id == perfil_id).one().usage_count
+
+
+@pytest.mark.anyio
+async def test_stream_cortado_por_el_cliente_devuelve_el_uso(db, candidato, async_engine, monkeypatch):
+    import main
+
+    async def extraer(file):
+        return "Desarrollador con 5 años de experiencia en python"
+
+    # OpenAI manda un fragmento y después se queda colgado: el cliente corta la conexión a mitad del stream
+    async def stream_colgado(**kwargs):
+        yield SimpleNamespace(type="response.output_text.delta", delta="Fortalezas: ")
+        await anyio.sleep_forever()
+
+    monkeypatch.setattr(main, "extract_text_async", extraer)
+    monkeypatch.setattr(main.llm_gateway, "stream", stream_colgado)
+
+    pedido = httpx.Request(
+        "POST", "http://testserver/feedbackCandidate/stream/",
+        headers={"Authorization": "Bearer test"},
+        files={"file": ("cv.pdf", b"%PDF-1.4 contenido", "application/pdf")},
+        data={"profesion": "desarrollador backend"},
+    )
+    body = pedido.read()
+    scope = {
+        "type": "http",
+        # Con la spec 2.3 StreamingResponse escucha http.disconnect y cancela el generador
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/feedbackCandidate/stream/",
+        "raw_path": b"/feedbackCandidate/stream/",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in pedido.headers.items()],
+        "client": ("127.0.0.1", 1234),
+        "server": ("testserver", 80),
+        "state": {},
+    }
+
+    recibido = [{"type": "http.request", "body": body, "more_body": False}]
+    primer_fragmento = anyio.Event()
+    estados = []
+
+    async def receive():
+        if recibido:
+            return recibido.pop(0)
+        await primer_fragmento.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            estados.append(message["status"])
+        elif message["type"] == "http.response.body" and b"event: feedback" in message.get("body", b""):
+            primer_fragmento.set()
+
+    with anyio.fail_after(10):
+        await main.app(scope, receive, send)
+
+    assert estados == [200]
+    assert primer_fragmento.is_set()
+    assert _usage_count(db, candidato) == 0
@@ -0,0 +1,34 @@
+import pytest
+
+FILA = {
+    "nombre_del_cliente": "Acme",
+    "titulo_de_trabajo": "Desarrollador backend",
+    "perfil_del_trabajador": "3 años de experiencia",
+    "funciones_del_trabajo": "desarrollar apis, revisar código",
+    "habilidades": ["python", "sql"],
+}
+
+
+def test_fila_valida():
+    from job_import import normalizar_fila
+
+    trabajo = normalizar_fila(FILA)
+    assert trabajo["funciones"] == ["desarrollar apis", "revisar código"]
+    assert trabajo["habilidades"] == ["python", "sql"]
+
+
+@pytest.mark.parametrize("cambios, error", [
+    ({"nombre_del_cliente": None}, "falta nombre_del_cliente"),
+    ({"nombre_del_cliente": 123}, "nombre_del_cliente tiene que ser texto, no int"),
+    ({"titulo_de_trabajo": ["a"]}, "titulo_de_trabajo tiene que ser texto, no list"),
+    ({"titulo_de_trabajo": "  "}, "titulo_de_trabajo no puede estar vacío"),
+    ({"funciones_del_trabajo": 5}, "funciones_del_trabajo tiene que ser texto separado por comas o una lista, no int"),
+    ({"habilidades": {"python": True}}, "habilidades tiene que ser texto separado por comas o una lista, no dict"),
+    ({"funciones_del_trabajo": ""}, "funciones_del_trabajo no puede estar vacío"),
+])
+def test_errores_por_fila(cambios, error):
+    from job_import import normalizar_fila
+
+    with pytest.raises(ValueError) as excinfo:
+        normalizar_fila({**FILA, **cambios})
+    assert str(excinfo.value) == error
@@ -0,0 +1,41 @@
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def cliente(db, monkeypatch):
+    import auth
+    import main
+    from database import Analize
+
+    db.query(Analize).delete()
+    db.add_all([
+        Analize(name=f"Candidato {numero}", job_title="Backend", match_score=0.5, decision="Puntaje Medio",
+                feedback="feedback", file_name=f"cv_{numero}.pdf")
+        for numero in range(5)
+    ])
+    db.commit()
+
+    monkeypatch.setattr(auth, "verify_session_token", lambda token: {"sub": "test"} if token == "test" else None)
+    with TestClient(main.app, headers={"Authorization": "Bearer test"}) as client:
+        yield client
+
+
+def test_paginas_con_empate_en_el_orden(cliente):
+    # Todas las filas tienen el mismo match_score: el id desempata y no se repite ni se saltea ninguna
+    vistos, cursor = [], None
+    while True:
+        response = cliente.get("/analisis/", params={"limit": 2, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        vistos += [analisis["id"] for analisis in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+    assert len(vistos) == len(set(vistos)) == 5
+
+
+@pytest.mark.parametrize("order_by", ["name", "created_at", "id"])
+def test_cursor_de_otro_order_by_es_400(cliente, order_by):
+    cursor = cliente.get("/analisis/", params={"limit": 2, "order_by": "match_score"}).headers["x-next-cursor"]
+    response = cliente.get("/analisis/", params={"limit": 2, "order_by": order_by, "cursor": cursor})
+    assert response.status_code == 400
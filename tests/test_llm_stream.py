@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+import pytest
+
+
+def _stream(*eventos):
+    async def stream(**kwargs):
+        for evento in eventos:
+            yield evento
+    return stream
+
+
+async def _consumir(main, prompt: str) -> list:
+    partes = []
+    async for delta in main.generar_respuesta_llm_stream("sistema", prompt):
+        partes.append(delta)
+    return partes
+
+
+@pytest.mark.anyio
+async def test_stream_completo_queda_en_el_cache(monkeypatch):
+    import main
+    from llm_cache import ResponseCache
+
+    monkeypatch.setattr(main.llm_gateway, "stream", _stream(
+        SimpleNamespace(type="response.output_text.delta", delta="Hola "),
+        SimpleNamespace(type="response.output_text.delta", delta="mundo"),
+        SimpleNamespace(type="response.completed", response=SimpleNamespace()),
+    ))
+
+    assert await _consumir(main, "completo") == ["Hola ", "mundo"]
+    assert main.llm_cache.get(ResponseCache.key_for("gpt-4o-mini", "sistema", "completo")) == "Hola mundo"
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("final", [
+    SimpleNamespace(type="response.incomplete", response=SimpleNamespace(incomplete_details=SimpleNamespace(reason="max_output_tokens"))),
+    SimpleNamespace(type="response.failed", response=SimpleNamespace(error=SimpleNamespace(message="server_error"))),
+    None,
+])
+async def test_stream_sin_completar_no_se_guarda(monkeypatch, final):
+    import main
+    from llm_cache import ResponseCache
+    from llm_gateway import LLMRespuestaIncompleta
+
+    eventos = [SimpleNamespace(type="response.output_text.delta", delta="Fortalezas: ")]
+    if final is not None:
+        eventos.append(final)
+    monkeypatch.setattr(main.llm_gateway, "stream", _stream(*eventos))
+
+    prompt = f"incompleto {final and final.type}"
+    with pytest.raises(LLMRespuestaIncompleta):
+        await _consumir(main, prompt)
+    assert main.llm_cache.get(ResponseCache.key_for("gpt-4o-mini", "sistema", prompt)) is None
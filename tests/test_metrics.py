@@ -0,0 +1,44 @@
+from fastapi.testclient import TestClient
+
+
+def _contador(metodo: str, ruta: str, status: str) -> float:
+    from metrics import REQUESTS
+    return REQUESTS.labels(metodo, ruta, status)._value.get()
+
+
+def test_metrics_envuelve_a_todos_salvo_request_id():
+    import main
+    from logging_config import RequestIdMiddleware
+    from metrics import MetricsMiddleware
+
+    # user_middleware va del más externo al más interno
+    assert [middleware.cls for middleware in main.app.user_middleware[:2]] == [RequestIdMiddleware, MetricsMiddleware]
+
+
+def test_cuenta_los_preflight_de_cors_y_los_413():
+    import main
+
+    with TestClient(main.app) as client:
+        preflight = _contador("OPTIONS", "sin_ruta", "200")
+        response = client.options("/analisis/", headers={
+            "Origin": "http://localhost:3000", "Access-Control-Request-Method": "GET",
+        })
+        assert response.status_code == 200
+        assert _contador("OPTIONS", "sin_ruta", "200") == preflight + 1
+
+        demasiado_grande = _contador("POST", "sin_ruta", "413")
+        response = client.post("/analyze/", content=b"x" * 1024, headers={
+            "Content-Type": "multipart/form-data; boundary=x", "Content-Length": str(main.MAX_UPLOAD_BYTES * 2),
+        })
+        assert response.status_code == 413
+        assert _contador("POST", "sin_ruta", "413") == demasiado_grande + 1
+
+
+def test_embeddings_stats_pide_sesion(monkeypatch):
+    import auth
+    import main
+
+    monkeypatch.setattr(auth, "verify_session_token", lambda token: {"sub": "test"} if token == "test" else None)
+    with TestClient(main.app) as client:
+        assert client.get("/embeddings/stats").status_code == 404
+        assert client.get("/embeddings/stats", headers={"Authorization": "Bearer test"}).status_code == 200
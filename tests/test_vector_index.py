@@ -0,0 +1,13 @@
+import numpy as np
+import pytest
+
+
+def test_no_abre_un_indice_de_otro_encoder(tmp_path):
+    from vector_index import VectorIndex
+
+    indice = VectorIndex(str(tmp_path), dim=4, encoder="all-MiniLM-L6-v2")
+    indice.append([1], np.ones((1, 4)))
+
+    assert len(VectorIndex(str(tmp_path), dim=4, encoder="all-MiniLM-L6-v2")) == 1
+    with pytest.raises(ValueError, match="encoder"):
+        VectorIndex(str(tmp_path), dim=4, encoder="all-MiniLM-L6-v2+onnx-int8")